@@ -0,0 +1,81 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import TYPE_CHECKING, Any, Optional, cast
+
+from conf import settings
+
+from .stub import StubProxy
+from .utils import serve
+
+if TYPE_CHECKING:
+    from quart.testing import QuartClient
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from shared.types import ASGIApp
+
+
+@dataclass
+class BootedApp:
+    app: "ASGIApp"
+    client: "QuartClient"
+    user_headers: dict[str, str]
+    superuser_headers: dict[str, str]
+    proxy: StubProxy
+
+    async def get(self, path: str, superuser: bool = False) -> Any:
+        response = await self.client.get(
+            path, headers=self.superuser_headers if superuser else self.user_headers
+        )
+        await response.get_data()
+        return response
+
+
+@asynccontextmanager
+async def boot(database_url: Optional[str] = None, proxy_latency: float = 0.0):
+    """
+    Boots the Quart app in-process, against a migrated database (a temporary SQLite
+    file unless `database_url` is set) and a stub proxy service. Yields a test client
+    plus the headers of an authenticated user and superuser.
+    """
+    from src.application.services import AuthService
+    from src.domain.models import BaseModel
+    from src.infra.repository.users import UsersRepo
+    from src.interface.api.http.flask.asgi import ASGIFactory
+
+    with TemporaryDirectory() as tmp:
+        settings.DATABASE_URL = (
+            database_url or f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        )
+
+        proxy = StubProxy(latency=proxy_latency)
+        async with serve(proxy) as proxy_url:
+            settings.PROXY_URl = proxy_url
+            app: "ASGIApp" = ASGIFactory.new()  # type: ignore
+
+            async with app.test_app() as test_app:
+                await app.state.db.migrate(base_model=BaseModel)
+
+                headers: list[dict[str, str]] = []
+                for username, is_superuser in (("user", False), ("superuser", True)):
+                    async with app.state.db.begin_session() as ses:  # type: ignore
+                        svc = AuthService(
+                            repo=UsersRepo(session=cast("AsyncSession", ses))
+                        )
+                        if await svc.repo.get_by_username(username) is None:
+                            await svc.create(
+                                username=username,
+                                password=username,
+                                is_superuser=is_superuser,
+                            )
+                        token = await svc.login(username=username, password=username)
+                    headers.append({"Authorization": f"Bearer {token}"})
+
+                yield BootedApp(
+                    app=app,
+                    client=cast("QuartClient", test_app.test_client()),
+                    user_headers=headers[0],
+                    superuser_headers=headers[1],
+                    proxy=proxy,
+                )
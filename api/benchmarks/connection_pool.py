@@ -0,0 +1,61 @@
+"""
+Load tests `/stock` against a slow proxy service with a database pool smaller than
+the concurrency and the users cache disabled, so that every request queries the
+database before calling the proxy. Connections are only held around the queries,
+so the throughput should follow `concurrency / latency` instead of being capped at
+`pool size / latency`, which is what pinning a connection per request allowed.
+
+    python -m benchmarks.connection_pool --concurrency 50 --latency 0.2
+"""
+
+import anyio
+import typer
+
+from conf import settings
+
+from .app import boot
+from .utils import drive, report, summarize
+
+
+async def _main(requests: int, concurrency: int, latency: float, pool_size: int):
+    settings.USERS_CACHE_TTL = 0
+    settings.DATABASE_READ_POOL_SIZE = pool_size
+    settings.DATABASE_READ_MAX_OVERFLOW = 0
+
+    async with boot(proxy_latency=latency) as booted:
+        # NOTE: SQLite files are written through a single connection
+        write_pool_size = 1 if settings.DATABASE_URL.startswith("sqlite") else pool_size
+
+        async def stock():
+            response = await booted.get("/api/v1/stock?q=aapl.us")
+            assert response.status_code == 200, response.status_code
+
+        samples, elapsed = await drive(
+            stock, requests=requests, concurrency=concurrency
+        )
+
+    report(
+        {
+            "benchmark": "connection_pool",
+            "concurrency": concurrency,
+            "proxy_latency": latency,
+            "read_pool_size": pool_size,
+            "write_pool_size": write_pool_size,
+            "pool_bound_rps": round(min(pool_size, write_pool_size) / latency, 2),
+            "max_in_flight_proxy_calls": booted.proxy.max_in_flight,
+            "stock": summarize(samples, elapsed),
+        }
+    )
+
+
+def main(
+    requests: int = 500,
+    concurrency: int = 50,
+    latency: float = 0.2,
+    pool_size: int = 2,
+):
+    anyio.run(_main, requests, concurrency, latency, pool_size)
+
+
+if __name__ == "__main__":
+    typer.run(main)
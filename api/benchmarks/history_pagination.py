@@ -0,0 +1,131 @@
+"""
+Seeds a SQLite database with millions of `stocks` rows and compares reading the
+whole history of a heavy user (the previous behaviour) against reading a single
+keyset page of it, with and without the `(user_id, created_at DESC, id)` index.
+
+    python -m benchmarks.history_pagination --rows 1000000 --users 1000
+"""
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Awaitable, Callable
+
+import anyio
+import typer
+from sqlalchemy import select, text
+
+from src.application.ports import UserIdentity
+from src.application.services import StockService
+from src.domain.models import BaseModel, Stock
+from src.infra.db.db import Database
+from src.infra.db.seed import seed
+from src.infra.repository.stocks import StocksRepo
+
+from .utils import report, summarize
+
+# NOTE: The first seeded user, which gets `heavy_share` of the rows
+HEAVY_USER_ID = 1
+
+
+async def _measure(func: Callable[[], Awaitable[Any]], repeat: int):
+    samples: list[float] = []
+    for _ in range(repeat):
+        start = perf_counter()
+        await func()
+        samples.append(perf_counter() - start)
+    return summarize(samples)
+
+
+async def _measure_pages(db: Database, limit: int, repeat: int):
+    user = UserIdentity(id=HEAVY_USER_ID, uuid="", is_superuser=False)
+
+    async with db.begin_session() as session:
+        svc = StockService(stocks_repo=StocksRepo(session=session))
+        total = await session.scalar(
+            text("SELECT count(*) FROM stocks WHERE user_id = :id"),
+            {"id": HEAVY_USER_ID},
+        )
+        middle = (
+            await session.scalars(
+                select(Stock)
+                .where(Stock.user_id == HEAVY_USER_ID)
+                .order_by(Stock.created_at.desc(), Stock.id)
+                .offset((total or 0) // 2)
+                .limit(1)
+            )
+        ).one()
+        deep_cursor = svc._encode_cursor(middle)  # type: ignore
+
+        async def first_page():
+            await svc.get_history_page(user=user, limit=limit)
+
+        async def deep_page():
+            await svc.get_history_page(user=user, limit=limit, cursor=deep_cursor)
+
+        return {
+            "first_page": await _measure(first_page, repeat),
+            "deep_page": await _measure(deep_page, repeat),
+        }
+
+
+async def _main(rows: int, users: int, heavy_share: float, limit: int, repeat: int):
+    with TemporaryDirectory() as tmp:
+        db = Database(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        await db.connect()
+        try:
+            await db.migrate(base_model=BaseModel)
+
+            start = perf_counter()
+            await seed(db, users=users, rows=rows, heavy_share=heavy_share)
+            seed_time = perf_counter() - start
+
+            async with db.begin_session() as session:
+                history_rows = len(
+                    await StocksRepo(session=session).get_stocks_history(
+                        user_id=HEAVY_USER_ID
+                    )
+                )
+
+                async def full_history():
+                    user = UserIdentity(id=HEAVY_USER_ID, uuid="", is_superuser=False)
+                    svc = StockService(stocks_repo=StocksRepo(session=session))
+                    await svc.get_history(user=user)
+
+                full = await _measure(full_history, max(1, repeat // 10))
+
+            indexed = await _measure_pages(db, limit=limit, repeat=repeat)
+
+            async with db.engine.begin() as conn:
+                await conn.execute(text("DROP INDEX ix_stocks_user_id_created_at_id"))
+            not_indexed = await _measure_pages(db, limit=limit, repeat=repeat)
+        finally:
+            await db.disconnect()
+
+    report(
+        {
+            "benchmark": "history_pagination",
+            "rows": rows,
+            "users": users,
+            "heavy_user_rows": history_rows,
+            "seed_seconds": round(seed_time, 2),
+            "page_size": limit,
+            "full_history": full,
+            "with_index": indexed,
+            "without_index": not_indexed,
+        }
+    )
+
+
+def main(
+    rows: int = 1_000_000,
+    users: int = 1000,
+    heavy_share: float = 0.05,
+    limit: int = 100,
+    repeat: int = 20,
+):
+    anyio.run(_main, rows, users, heavy_share, limit, repeat)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,102 @@
+"""
+Reads the whole history of a heavy user through fully hydrated `Stock` instances
+(the previous behaviour) and through the column-only rows of `StocksRepo`, and
+reports the rows per second and the memory allocated by both.
+
+    python -m benchmarks.history_reads --rows 200000 --users 10
+"""
+
+import tracemalloc
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Optional
+
+import anyio
+import typer
+from sqlalchemy import select
+
+from src.application.ports import UserIdentity
+from src.application.services import StockService
+from src.domain.models import BaseModel, Stock
+from src.infra.db.db import Database
+from src.infra.db.seed import seed
+from src.infra.repository.stocks import StocksRepo
+
+from .history_pagination import HEAVY_USER_ID
+from .utils import report, summarize
+
+
+class OrmStocksRepo(StocksRepo):
+    async def get_stocks_history(  # type: ignore
+        self, user_id: int, limit: Optional[int] = None, after: None = None
+    ):
+        stmt = (
+            select(Stock)
+            .where(Stock.user_id == user_id)
+            .order_by(Stock.created_at.desc(), Stock.id)
+        )
+        return (await self.session.scalars(stmt)).all()
+
+
+async def _measure(db: Database, repo_class: type[StocksRepo], repeat: int):
+    user = UserIdentity(id=HEAVY_USER_ID, uuid="", is_superuser=False)
+    samples: list[float] = []
+    rows = 0
+
+    for _ in range(repeat):
+        # NOTE: A new session every time, so the identity map starts empty
+        async with db.begin_session() as session:
+            svc = StockService(stocks_repo=repo_class(session=session))
+            start = perf_counter()
+            rows = len(await svc.get_history(user=user))
+            samples.append(perf_counter() - start)
+
+    async with db.begin_session() as session:
+        svc = StockService(stocks_repo=repo_class(session=session))
+        tracemalloc.start()
+        try:
+            await svc.get_history(user=user)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        **summarize(samples),
+        "rows_per_second": round(rows / (sum(samples) / len(samples)), 2),
+        "peak_memory_mb": round(peak / 1024 / 1024, 2),
+    }
+
+
+async def _main(rows: int, users: int, heavy_share: float, repeat: int):
+    with TemporaryDirectory() as tmp:
+        db = Database(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        await db.connect()
+        try:
+            await db.migrate(base_model=BaseModel)
+            await seed(db, users=users, rows=rows, heavy_share=heavy_share)
+
+            orm = await _measure(db, OrmStocksRepo, repeat)
+            core = await _measure(db, StocksRepo, repeat)
+        finally:
+            await db.disconnect()
+
+    report(
+        {
+            "benchmark": "history_reads",
+            "rows": rows,
+            "heavy_share": heavy_share,
+            "orm": orm,
+            "core": core,
+        }
+    )
+
+
+def main(
+    rows: int = 200_000, users: int = 10, heavy_share: float = 0.5, repeat: int = 5
+):
+    anyio.run(_main, rows, users, heavy_share, repeat)
+
+
+if __name__ == "__main__":
+    typer.run(main)
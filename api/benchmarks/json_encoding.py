@@ -0,0 +1,93 @@
+"""
+Builds and serializes a history response of `--rows` entries with `strftime` and the
+stdlib `json` provider (the previous behaviour) and with `isoformat` and the orjson
+provider, and reports the latency of both.
+
+    python -m benchmarks.json_encoding --rows 10000
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from time import perf_counter
+from typing import Any
+
+import typer
+from quart import Quart
+from quart.json.provider import DefaultJSONProvider
+
+from shared.utils import to_fixed
+from src.application.ports import StockHistoryRow
+from src.application.services import StockService
+from src.interface.api.http.flask.serializers import ORJSONProvider
+
+from .utils import report, summarize
+
+
+def _to_history_entry(entry: StockHistoryRow):
+    return {
+        "date": entry.stock_datetime.strftime("%Y-%m-%d %H:%M:%S"),
+        "name": entry.name,
+        "symbol": entry.symbol,
+        "open": to_fixed(entry.open),
+        "high": to_fixed(entry.high),
+        "low": to_fixed(entry.low),
+        "close": to_fixed(entry.close),
+    }
+
+
+def _to_history_entries(rows: list[StockHistoryRow]):
+    return [_to_history_entry(row) for row in rows]
+
+
+def _measure(
+    rows: list[StockHistoryRow],
+    to_entries: Any,
+    provider: DefaultJSONProvider,
+    repeat: int,
+):
+    samples: list[float] = []
+    for _ in range(repeat):
+        start = perf_counter()
+        provider.response(to_entries(rows))
+        samples.append(perf_counter() - start)
+    return summarize(samples)
+
+
+def main(rows: int = 10_000, repeat: int = 50):
+    start = datetime(2020, 1, 1)
+    history = [
+        StockHistoryRow(
+            id=idx,
+            created_at=start + timedelta(seconds=idx),
+            stock_datetime=start + timedelta(seconds=idx),
+            name="APPLE",
+            symbol="AAPL.US",
+            open=Decimal("230.85000"),
+            high=Decimal("240.19000"),
+            low=Decimal("230.81000"),
+            close=Decimal("239.12000"),
+        )
+        for idx in range(rows)
+    ]
+    app = Quart(__name__)
+    svc = StockService(stocks_repo=None)  # type: ignore
+
+    report(
+        {
+            "benchmark": "json_encoding",
+            "rows": rows,
+            "stdlib": _measure(
+                history, _to_history_entries, DefaultJSONProvider(app), repeat
+            ),
+            "orjson": _measure(
+                history,
+                svc._to_history_entries,  # type: ignore
+                ORJSONProvider(app),
+                repeat,
+            ),
+        }
+    )
+
+
+if __name__ == "__main__":
+    typer.run(main)
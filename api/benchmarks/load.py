@@ -0,0 +1,127 @@
+"""
+Boots the api in-process against a stub proxy service and a database (a temporary
+SQLite file unless `--database-url` is set), fills the history of the benchmark user
+and then load tests `/stock`, `/history` and `/stats` one after the other, reporting
+the throughput and the latency percentiles of each as JSON, so that two commits can be
+compared by running it on both.
+
+    python -m benchmarks.load --requests 2000 --concurrency 20
+    python manage.py bench --endpoint stock --endpoint history --output before.json
+"""
+
+import json
+import subprocess
+from pathlib import Path
+from typing import Any, Optional
+
+import anyio
+import typer
+
+from conf import settings
+
+from .app import BootedApp, boot
+from .utils import drive, report, summarize
+
+SYMBOLS = ("aapl.us", "msft.us", "googl.us", "amzn.us", "nvda.us", "tsla.us")
+
+# NOTE: Path and whether the superuser sends the requests, by endpoint
+ENDPOINTS = {
+    "stock": ("/api/v1/stock?q={symbol}", False),
+    "history": ("/api/v1/history", False),
+    "stats": ("/api/v1/stats", True),
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _seed(booted: BootedApp, history_rows: int):
+    """Fills the history through the app itself, `MAX_STOCKS_PER_REQUEST` at a time"""
+    symbols = [SYMBOLS[idx % len(SYMBOLS)] for idx in range(history_rows)]
+    size = settings.MAX_STOCKS_PER_REQUEST
+    for offset in range(0, len(symbols), size):
+        response = await booted.get(
+            f"/api/v1/stocks?q={','.join(symbols[offset : offset + size])}"
+        )
+        assert response.status_code == 200, response.status_code
+
+
+async def _load_test(booted: BootedApp, endpoint: str, requests: int, concurrency: int):
+    path, superuser = ENDPOINTS[endpoint]
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        response = await booted.get(
+            path.format(symbol=SYMBOLS[calls % len(SYMBOLS)]), superuser=superuser
+        )
+        assert response.status_code == 200, (endpoint, response.status_code)
+
+    # NOTE: Warms up the caches and the connection pools
+    await drive(call, requests=min(requests, 50), concurrency=concurrency)
+    samples, elapsed = await drive(call, requests=requests, concurrency=concurrency)
+    return summarize(samples, elapsed)
+
+
+async def run(
+    endpoints: list[str],
+    requests: int = 1000,
+    concurrency: int = 10,
+    history_rows: int = 1000,
+    proxy_latency: float = 0.0,
+    database_url: Optional[str] = None,
+) -> dict[str, Any]:
+    async with boot(database_url=database_url, proxy_latency=proxy_latency) as booted:
+        await _seed(booted, history_rows=history_rows)
+        results = {
+            endpoint: await _load_test(booted, endpoint, requests, concurrency)
+            for endpoint in endpoints
+        }
+
+    return {
+        "benchmark": "load",
+        "commit": _git_commit(),
+        "database": (database_url or "sqlite").split(":", 1)[0],
+        "requests": requests,
+        "concurrency": concurrency,
+        "history_rows": history_rows,
+        "proxy_latency": proxy_latency,
+        "endpoints": results,
+    }
+
+
+def main(
+    endpoint: list[str] = typer.Option(
+        list(ENDPOINTS), help=f"Any of {', '.join(ENDPOINTS)}, can be repeated"
+    ),
+    requests: int = 1000,
+    concurrency: int = 10,
+    history_rows: int = 1000,
+    proxy_latency: float = 0.0,
+    database_url: Optional[str] = None,
+    output: Optional[Path] = typer.Option(None, help="Also writes the report here"),
+):
+    if unknown := set(endpoint) - set(ENDPOINTS):
+        raise typer.BadParameter(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+    results = anyio.run(
+        run, endpoint, requests, concurrency, history_rows, proxy_latency, database_url
+    )
+    report(results)
+    if output is not None:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,78 @@
+"""
+Rounds the quotes of a history of `--rows` entries with `to_fixed`, value by value
+(the previous behaviour), and with `to_fixed_many`, a column at a time, and reports
+the latency of both.
+
+    python -m benchmarks.number_formatting --rows 100000
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from random import Random
+from time import perf_counter
+from typing import Any, Callable
+
+import typer
+
+from shared.utils import to_fixed
+from src.application.ports import StockHistoryRow
+from src.application.services import StockService
+
+from .utils import report, summarize
+
+
+def _to_history_entries(history: list[StockHistoryRow]):
+    return [
+        {
+            "date": entry.stock_datetime.isoformat(" ", "seconds"),
+            "name": entry.name,
+            "symbol": entry.symbol,
+            "open": to_fixed(entry.open),
+            "high": to_fixed(entry.high),
+            "low": to_fixed(entry.low),
+            "close": to_fixed(entry.close),
+        }
+        for entry in history
+    ]
+
+
+def _measure(func: Callable[[list[StockHistoryRow]], Any], history: Any, repeat: int):
+    samples: list[float] = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func(history)
+        samples.append(perf_counter() - start)
+    return summarize(samples)
+
+
+def main(rows: int = 100_000, repeat: int = 10):
+    rnd, now = Random(42), datetime(2025, 1, 28, 19, 3, 58)
+
+    def quote():
+        return Decimal(f"{rnd.uniform(1, 1000):.5f}")
+
+    history = [
+        StockHistoryRow(
+            idx, now, now, "APPLE", "AAPL.US", quote(), quote(), quote(), quote()
+        )
+        for idx in range(rows)
+    ]
+    svc = StockService(stocks_repo=None)  # type: ignore
+
+    assert _to_history_entries(history) == svc._to_history_entries(history)  # type: ignore
+    report(
+        {
+            "benchmark": "number_formatting",
+            "rows": rows,
+            "to_fixed": _measure(_to_history_entries, history, repeat),
+            "to_fixed_many": _measure(
+                svc._to_history_entries,  # type: ignore
+                history,
+                repeat,
+            ),
+        }
+    )
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,87 @@
+"""
+Fires concurrent `AuthService.login` calls alongside `/stock` traffic, with bcrypt
+running inline on the event loop (the previous behaviour) and offloaded to the
+worker pool, and reports the latency of both.
+
+    python -m benchmarks.password_hashing --logins 20 --requests 500
+"""
+
+from time import perf_counter
+from typing import cast
+
+import anyio
+import typer
+from bcrypt import checkpw
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.application.services import AuthService
+from src.infra.repository.users import UsersRepo
+
+from .app import BootedApp, boot
+from .utils import drive, report, summarize
+
+
+class InlineAuthService(AuthService):
+    async def _verify_password(self, raw: str, hashed: str):
+        return checkpw(password=raw.encode(), hashed_password=hashed.encode())
+
+
+async def _run(
+    booted: BootedApp,
+    svc_class: type[AuthService],
+    logins: int,
+    requests: int,
+    concurrency: int,
+):
+    login_samples: list[float] = []
+
+    async def login():
+        async with booted.app.state.db.begin_session() as ses:  # type: ignore
+            start = perf_counter()
+            await svc_class(repo=UsersRepo(session=cast(AsyncSession, ses))).login(
+                username="user", password="user"
+            )
+            login_samples.append(perf_counter() - start)
+
+    async def stock():
+        await booted.get("/api/v1/stock?q=aapl.us")
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(logins):
+            tg.start_soon(login)
+        samples, elapsed = await drive(
+            stock, requests=requests, concurrency=concurrency
+        )
+
+    return {
+        "stock": summarize(samples, elapsed),
+        "login": summarize(login_samples),
+    }
+
+
+async def _main(logins: int, requests: int, concurrency: int):
+    async with boot() as booted:
+        # NOTE: Warms up the pools and caches so that both runs start equal
+        await drive(
+            lambda: booted.get("/api/v1/stock?q=aapl.us"), requests=50, concurrency=5
+        )
+        inline = await _run(booted, InlineAuthService, logins, requests, concurrency)
+        offloaded = await _run(booted, AuthService, logins, requests, concurrency)
+
+    report(
+        {
+            "benchmark": "password_hashing",
+            "logins": logins,
+            "concurrency": concurrency,
+            "inline": inline,
+            "offloaded": offloaded,
+        }
+    )
+
+
+def main(logins: int = 20, requests: int = 500, concurrency: int = 10):
+    anyio.run(_main, logins, requests, concurrency)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,74 @@
+"""
+Compares the latency of fetching a quote from the proxy service when a new
+`AsyncClient` is opened per call (the previous behaviour) against the pooled,
+application-lifetime client used by `ProxyAdapter`.
+
+    python -m benchmarks.proxy_client --requests 2000 --concurrency 10
+"""
+
+import anyio
+import typer
+
+from src.infra.proxy.adapter import fetch
+from src.infra.proxy.client import HTTPClient
+
+from .stub import StubProxy
+from .utils import drive, report, serve, summarize
+
+
+async def _per_call(base_url: str, requests: int, concurrency: int):
+    async def call():
+        client = HTTPClient(base_url)
+        await client.connect()
+        try:
+            await fetch(
+                client=client.client,
+                method="GET",
+                url="details/aapl.us",
+                expected_status_codes=(200,),
+            )
+        finally:
+            await client.disconnect()
+
+    return await drive(call, requests=requests, concurrency=concurrency)
+
+
+async def _pooled(base_url: str, requests: int, concurrency: int):
+    client = HTTPClient(base_url)
+    await client.connect()
+
+    async def call():
+        await fetch(
+            client=client.client,
+            method="GET",
+            url="details/aapl.us",
+            expected_status_codes=(200,),
+        )
+
+    try:
+        return await drive(call, requests=requests, concurrency=concurrency)
+    finally:
+        await client.disconnect()
+
+
+async def _main(requests: int, concurrency: int):
+    async with serve(StubProxy()) as base_url:
+        before = await _per_call(base_url, requests, concurrency)
+        after = await _pooled(base_url, requests, concurrency)
+
+    report(
+        {
+            "benchmark": "proxy_client",
+            "concurrency": concurrency,
+            "per_call_client": summarize(*before),
+            "pooled_client": summarize(*after),
+        }
+    )
+
+
+def main(requests: int = 2000, concurrency: int = 10):
+    anyio.run(_main, requests, concurrency)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,77 @@
+"""
+Load tests `/stock` with the request metrics disabled and enabled, and times a phase
+with and without a request being measured, to report the overhead of recording the
+latencies and the phases of every request.
+
+    python -m benchmarks.request_metrics --requests 2000
+"""
+
+from time import perf_counter
+
+import anyio
+import typer
+
+from conf import settings
+from shared.metrics import RequestMetrics, phase
+
+from .app import boot
+from .utils import drive, report, summarize
+
+
+def _measure_phase(iterations: int):
+    start = perf_counter()
+    for _ in range(iterations):
+        with phase("bench"):
+            pass
+    return (perf_counter() - start) / iterations * 1e9
+
+
+async def _load_test(requests: int, concurrency: int, enabled: bool):
+    settings.REQUEST_METRICS_ENABLED = enabled
+
+    async with boot() as booted:
+
+        async def stock():
+            response = await booted.get("/api/v1/stock?q=aapl.us")
+            assert response.status_code == 200, response.status_code
+
+        # NOTE: Warms up the caches and the connection pools
+        await drive(stock, requests=50, concurrency=concurrency)
+        samples, elapsed = await drive(
+            stock, requests=requests, concurrency=concurrency
+        )
+
+    return summarize(samples, elapsed)
+
+
+async def _main(requests: int, concurrency: int, iterations: int):
+    disabled = await _load_test(requests, concurrency, enabled=False)
+    enabled = await _load_test(requests, concurrency, enabled=True)
+
+    idle_phase = _measure_phase(iterations)
+    metrics = RequestMetrics()
+    token = metrics.begin()
+    active_phase = _measure_phase(iterations)
+    metrics.end(token, route="/bench", method="GET", status=200, elapsed=0.0)
+
+    report(
+        {
+            "benchmark": "request_metrics",
+            "concurrency": concurrency,
+            "disabled": disabled,
+            "enabled": enabled,
+            "p50_overhead_ms": round(enabled["p50_ms"] - disabled["p50_ms"], 3),
+            "phase_ns": {
+                "outside_requests": round(idle_phase, 1),
+                "inside_requests": round(active_phase, 1),
+            },
+        }
+    )
+
+
+def main(requests: int = 2000, concurrency: int = 1, iterations: int = 1_000_000):
+    anyio.run(_main, requests, concurrency, iterations)
+
+
+if __name__ == "__main__":
+    typer.run(main)
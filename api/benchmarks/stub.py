@@ -0,0 +1,79 @@
+import json
+from typing import Any, Awaitable, Callable
+from urllib.parse import parse_qs
+
+import anyio
+
+type Scope = dict[str, Any]
+type Receive = Callable[[], Awaitable[dict[str, Any]]]
+type Send = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+def quote(symbol: str):
+    return {
+        "symbol": symbol.upper(),
+        "date": "2025-01-28",
+        "time": "19:03:58",
+        "open": 230.85,
+        "high": 240.19,
+        "low": 230.81,
+        "close": 239.12,
+        "volume": 29605802,
+        "name": symbol.split(".")[0].upper(),
+    }
+
+
+class StubProxy:
+    """Minimal ASGI app that answers like the proxy service, so the api can be
+    benchmarked without reaching stooq. `latency` simulates the upstream time"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return  # pragma: no cover
+
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency > 0:
+                await anyio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+        path: str = scope["path"]
+        if path.startswith("/details/"):
+            status, body = 200, quote(path.rsplit("/", 1)[-1])
+        elif path == "/details":
+            symbols = parse_qs(scope["query_string"].decode()).get("s", [""])[0]
+            status, body = (
+                200,
+                {
+                    "results": {
+                        symbol.strip().upper(): quote(symbol.strip())
+                        for symbol in symbols.split(",")
+                        if symbol.strip()
+                    },
+                    "errors": {},
+                },
+            )
+        else:
+            status, body = 404, {"detail": "Not Found"}
+
+        payload = json.dumps(body).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(payload)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
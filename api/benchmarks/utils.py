@@ -0,0 +1,77 @@
+import json
+from contextlib import asynccontextmanager
+from math import ceil
+from time import perf_counter
+from typing import Any, Awaitable, Callable
+
+import anyio
+
+
+def percentile(samples: list[float], q: float):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, ceil(q * len(ordered)) - 1))]
+
+
+def summarize(samples: list[float], elapsed: float | None = None):
+    """Latencies are expected in seconds and reported in milliseconds"""
+    summary: dict[str, Any] = {
+        "requests": len(samples),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+        "max_ms": round(max(samples, default=0.0) * 1000, 3),
+    }
+    if elapsed:
+        summary["rps"] = round(len(samples) / elapsed, 2)
+    return summary
+
+
+def report(results: dict[str, Any]):
+    print(json.dumps(results, indent=2))
+
+
+async def drive(func: Callable[[], Awaitable[Any]], requests: int, concurrency: int):
+    """Calls `func` `requests` times from `concurrency` workers and returns the
+    latency of each call plus the wall time of the whole run"""
+    samples: list[float] = []
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = perf_counter()
+            await func()
+            samples.append(perf_counter() - start)
+
+    start = perf_counter()
+    async with anyio.create_task_group() as tg:
+        for _ in range(concurrency):
+            tg.start_soon(worker)
+
+    return samples, perf_counter() - start
+
+
+@asynccontextmanager
+async def serve(app: Any, host: str = "127.0.0.1", port: int = 0):
+    """Runs an ASGI app with uvicorn inside the current event loop and yields
+    its base url"""
+    import uvicorn
+
+    config = uvicorn.Config(
+        app, host=host, port=port, lifespan="off", log_level="error"
+    )
+    server = uvicorn.Server(config)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(server.serve)
+        while not server.started:
+            await anyio.sleep(0.01)
+
+        sock = server.servers[0].sockets[0]
+        try:
+            yield f"http://{host}:{sock.getsockname()[1]}"
+        finally:
+            server.should_exit = True
@@ -1,17 +1,26 @@
-import tomllib
+from functools import lru_cache
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
-from shared.types import EnvChoices
 from shared.utils import get_env
 
-with open("pyproject.toml", mode="rb") as stream:
-    pyproject: dict[str, str] = tomllib.load(stream)["project"]
+if TYPE_CHECKING:
+    from shared.types import EnvChoices
 
 
 ENV_PREFIX = "STOCK_API_"
 
 
+@lru_cache(maxsize=1)
+def _get_project(base_dir: Path) -> dict[str, str]:
+    # NOTE: Read on first use rather than on import, and from the project directory
+    # rather than the current one
+    import tomllib
+
+    with open(base_dir / "pyproject.toml", mode="rb") as stream:
+        return tomllib.load(stream)["project"]
+
+
 with get_env().prefixed(ENV_PREFIX) as env:
 
     class BaseSettings:
@@ -19,17 +28,77 @@ with get_env().prefixed(ENV_PREFIX) as env:
 
         ENVIRONMENT_PREFIX = ENV_PREFIX
 
-        APP_NAME = pyproject["name"]
-        APP_DESCRIPTION = pyproject["description"]
-        APP_VERSION = pyproject["version"]
-
         API_PREFIX = "/api"
 
+        MAX_STOCKS_PER_REQUEST = env.int("MAX_STOCKS_PER_REQUEST", 50)
+        HISTORY_PAGE_SIZE = env.int("HISTORY_PAGE_SIZE", 100)
+        HISTORY_MAX_PAGE_SIZE = env.int("HISTORY_MAX_PAGE_SIZE", 1000)
+        HISTORY_STREAM_CHUNK_SIZE = env.int("HISTORY_STREAM_CHUNK_SIZE", 500)
+
+        HISTORY_WRITE_BEHIND = env.bool("HISTORY_WRITE_BEHIND", False)
+        HISTORY_WRITER_MAX_SIZE = env.int("HISTORY_WRITER_MAX_SIZE", 10_000)
+        HISTORY_WRITER_BATCH_SIZE = env.int("HISTORY_WRITER_BATCH_SIZE", 500)
+        HISTORY_WRITER_FLUSH_INTERVAL = env.float("HISTORY_WRITER_FLUSH_INTERVAL", 0.5)
+        HISTORY_WRITER_MAX_RETRIES = env.int("HISTORY_WRITER_MAX_RETRIES", 3)
+        HISTORY_WRITER_RETRY_BACKOFF = env.float("HISTORY_WRITER_RETRY_BACKOFF", 0.1)
+
+        STATS_MAX_UP_TO = env.int("STATS_MAX_UP_TO", 100)
+        STATS_TRACKER_CAPACITY = env.int("STATS_TRACKER_CAPACITY", 1000)
+        STATS_RECONCILE_INTERVAL = env.float("STATS_RECONCILE_INTERVAL", 300.0)
+
         JWT_SECRET_KEY = env.str("JWT_SECRET_KEY")
         JWT_HASH_ALGO = env.str("JWT_HASH_ALGO")
         JWT_ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # A day
 
+        USERS_CACHE_MAX_SIZE = env.int("USERS_CACHE_MAX_SIZE", 10_000)
+        USERS_CACHE_TTL = env.float("USERS_CACHE_TTL", 60.0)  # Seconds
+        TOKENS_CACHE_MAX_SIZE = env.int("TOKENS_CACHE_MAX_SIZE", 10_000)
+
+        PASSWORD_HASHING_EXECUTOR = env.str(
+            "PASSWORD_HASHING_EXECUTOR",
+            "thread",
+            validate=lambda value: value in ("thread", "process"),
+        )
+        PASSWORD_HASHING_MAX_WORKERS = env.int("PASSWORD_HASHING_MAX_WORKERS", 4)
+
+        JSON_PROVIDER = env.str(
+            "JSON_PROVIDER",
+            "orjson",
+            validate=lambda value: value in ("orjson", "default"),
+        )
+
+        # NOTE: Reads go to the replica when its url is set
+        DATABASE_READ_URL: Optional[str] = env.str("DATABASE_READ_URL", None)
+        DATABASE_POOL_SIZE = env.int("DATABASE_POOL_SIZE", 5)
+        DATABASE_MAX_OVERFLOW = env.int("DATABASE_MAX_OVERFLOW", 5)
+        DATABASE_READ_POOL_SIZE = env.int("DATABASE_READ_POOL_SIZE", 5)
+        DATABASE_READ_MAX_OVERFLOW = env.int("DATABASE_READ_MAX_OVERFLOW", 5)
+        DATABASE_POOL_TIMEOUT = env.float("DATABASE_POOL_TIMEOUT", 30.0)  # Seconds
+        DATABASE_POOL_RECYCLE = env.int(
+            "DATABASE_POOL_RECYCLE", -1
+        )  # Seconds, -1 is off
+        DATABASE_POOL_PRE_PING = env.bool("DATABASE_POOL_PRE_PING", False)
+
+        # NOTE: Statements slower than this are logged, 0 logs none
+        SLOW_QUERY_THRESHOLD = env.float("SLOW_QUERY_THRESHOLD", 0.5)  # Seconds
+
+        SQLITE_JOURNAL_MODE = env.str("SQLITE_JOURNAL_MODE", "WAL")
+        SQLITE_SYNCHRONOUS = env.str("SQLITE_SYNCHRONOUS", "NORMAL")
+        SQLITE_BUSY_TIMEOUT = env.int("SQLITE_BUSY_TIMEOUT", 5000)  # Milliseconds
+        SQLITE_CACHE_SIZE = env.int("SQLITE_CACHE_SIZE", -64_000)  # 64MB, in KiB
+        SQLITE_MMAP_SIZE = env.int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)  # Bytes
+
         PROXY_URl = env.str("PROXY_URL", "http://localhost:8001")
+        PROXY_MAX_CONNECTIONS = env.int("PROXY_MAX_CONNECTIONS", 100)
+        PROXY_MAX_KEEPALIVE_CONNECTIONS = env.int("PROXY_MAX_KEEPALIVE_CONNECTIONS", 20)
+        PROXY_KEEPALIVE_EXPIRY = env.float("PROXY_KEEPALIVE_EXPIRY", 5.0)
+        PROXY_TIMEOUT = env.float("PROXY_TIMEOUT", 10.0)
+        PROXY_CONNECT_TIMEOUT = env.float("PROXY_CONNECT_TIMEOUT", 5.0)
+
+        REQUEST_METRICS_ENABLED = env.bool("REQUEST_METRICS_ENABLED", True)
+        METRICS_TOP_SYMBOLS = env.int("METRICS_TOP_SYMBOLS", 10)
+        # NOTE: Unless set, /metrics is public and leaves out the pools and top stocks
+        METRICS_TOKEN: Optional[str] = env.str("METRICS_TOKEN", None)
 
         ASGI_APP = "src.interface.api.http.flask.asgi:app"
 
@@ -40,10 +109,37 @@ with get_env().prefixed(ENV_PREFIX) as env:
             HOST: str
             PORT: int
 
+        @property
+        def APP_NAME(self):
+            return _get_project(self.BASE_DIR)["name"]
+
+        @property
+        def APP_DESCRIPTION(self):
+            return _get_project(self.BASE_DIR)["description"]
+
+        @property
+        def APP_VERSION(self):
+            return _get_project(self.BASE_DIR)["version"]
+
         @property
         def autocommit(self):
             return self.ENVIRONMENT != "testing"
 
+        @property
+        def expose_query_count(self):
+            return self.ENVIRONMENT != "production"
+
+        @property
+        def sqlite_pragmas(self):
+            return {
+                "journal_mode": self.SQLITE_JOURNAL_MODE,
+                "synchronous": self.SQLITE_SYNCHRONOUS,
+                "busy_timeout": self.SQLITE_BUSY_TIMEOUT,
+                "cache_size": self.SQLITE_CACHE_SIZE,
+                "mmap_size": self.SQLITE_MMAP_SIZE,
+                "foreign_keys": "ON",
+            }
+
         @property
         def should_reload(self):
             return self.ENVIRONMENT == "development"  # pragma: no cover
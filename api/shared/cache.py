@@ -0,0 +1,57 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Optional
+
+
+class TTLCache[K, V]:
+    """Bounded, in-process LRU cache whose entries expire after `ttl` seconds"""
+
+    _entries: OrderedDict[K, tuple[V, float]]
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, key: K) -> Optional[V]:
+        if (entry := self._entries.get(key)) is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if monotonic() >= expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if self.max_size <= 0 or ttl <= 0:
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = (value, monotonic() + ttl)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: K):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,122 @@
+from collections import Counter
+from heapq import nlargest
+from operator import itemgetter
+from time import monotonic, time
+from typing import Iterable, Literal, Mapping, Optional
+
+type Window = Literal["all", "hour", "day"]
+
+WINDOWS: tuple[Window, ...] = ("all", "hour", "day")
+WINDOW_SECONDS: dict[Window, int] = {"hour": 3600, "day": 86400}
+
+
+class SpaceSaving[K]:
+    """
+    Space-Saving heavy hitters sketch: keeps at most `capacity` counters and, once it
+    is full, an unseen key replaces the smallest counter and inherits its count. The
+    counts are therefore over-estimated by at most the count of the replaced key, and
+    every key requested more than `total / capacity` times is guaranteed to be kept.
+    """
+
+    _counts: dict[K, int]
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._counts = {}
+
+    def __len__(self):
+        return len(self._counts)
+
+    def add(self, key: K, count: int = 1):
+        if key in self._counts:
+            self._counts[key] += count
+        elif len(self._counts) < self.capacity:
+            self._counts[key] = count
+        elif self._counts:
+            # NOTE: O(capacity), but only paid for unseen keys once the sketch is full
+            victim = min(self._counts, key=self._counts.__getitem__)
+            self._counts[key] = self._counts.pop(victim) + count
+
+    def items(self):
+        return self._counts.items()
+
+    def top(self, n: int) -> list[tuple[K, int]]:
+        return nlargest(n, self._counts.items(), key=itemgetter(1))
+
+    def reset(self, counts: Mapping[K, int]):
+        self._counts = dict(nlargest(self.capacity, counts.items(), key=itemgetter(1)))
+
+
+class RotatingTopK[K]:
+    """
+    Sliding window made of `buckets` Space-Saving sketches of `bucket_seconds` each.
+    Stale buckets are recycled as time goes by, so only the last
+    `buckets * bucket_seconds` seconds are ever counted.
+    """
+
+    _slots: list[Optional[tuple[int, SpaceSaving[K]]]]
+
+    def __init__(self, capacity: int, bucket_seconds: int, buckets: int):
+        self.capacity = capacity
+        self.bucket_seconds = bucket_seconds
+        self._slots = [None] * buckets
+
+    def add(self, key: K, count: int = 1, now: Optional[float] = None):
+        epoch = int((time() if now is None else now) // self.bucket_seconds)
+        index = epoch % len(self._slots)
+
+        if (slot := self._slots[index]) is None or slot[0] != epoch:
+            slot = self._slots[index] = (epoch, SpaceSaving(self.capacity))
+
+        slot[1].add(key, count)
+
+    def top(self, n: int, now: Optional[float] = None) -> list[tuple[K, int]]:
+        epoch = int((time() if now is None else now) // self.bucket_seconds)
+        merged = Counter[K]()
+
+        for slot in self._slots:
+            if slot is not None and epoch - slot[0] < len(self._slots):
+                merged.update(dict(slot[1].items()))
+
+        return merged.most_common(n)
+
+
+class HeavyHitters[K]:
+    """
+    Approximate, in-process "most requested" counters, for all time and for the last
+    hour and day. The all time view can be reconciled with exact counts from the
+    database, which also restores it after a restart.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.total = SpaceSaving[K](capacity)
+        self.windows: dict[Window, RotatingTopK[K]] = {
+            "hour": RotatingTopK(capacity, bucket_seconds=60, buckets=60),
+            "day": RotatingTopK(capacity, bucket_seconds=3600, buckets=24),
+        }
+        self.reconciled_at: Optional[float] = None
+
+    def add(self, key: K, count: int = 1):
+        self.total.add(key, count)
+        now = time()
+        for window in self.windows.values():
+            window.add(key, count, now=now)
+
+    def add_many(self, keys: Iterable[K]):
+        for key, count in Counter(keys).items():
+            self.add(key, count)
+
+    def top(self, n: int, window: Window = "all") -> list[tuple[K, int]]:
+        if window == "all":
+            return self.total.top(n)
+        return self.windows[window].top(n)
+
+    def should_reconcile(self, interval: float):
+        return (
+            self.reconciled_at is None or monotonic() - self.reconciled_at >= interval
+        )
+
+    def reconcile(self, counts: Mapping[K, int]):
+        self.total.reset(counts)
+        self.reconciled_at = monotonic()
@@ -0,0 +1,195 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Coroutine, Iterable, Mapping, Optional
+
+type Labels = Mapping[str, str]
+type Sample = tuple[Labels, float]
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# NOTE: Only set while a request is being handled, everywhere else timing a phase is
+# a no-op
+_phases: ContextVar[Optional[dict[str, float]]] = ContextVar("phases", default=None)
+
+
+@dataclass(slots=True)
+class QueryCounter:
+    count: int = 0
+    seconds: float = 0.0
+    slow: int = 0
+
+    def record(self, elapsed: float, slow: bool = False):
+        self.count += 1
+        self.seconds += elapsed
+        self.slow += slow
+
+
+_queries: ContextVar[Optional[QueryCounter]] = ContextVar("queries", default=None)
+
+
+class Histogram:
+    """Prometheus style histogram, with fixed upper bounds given in seconds"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestMetrics:
+    """
+    Latency of the requests per route, method and status, and of the phases (see
+    `phase`) that they went through per route
+    """
+
+    latency: dict[tuple[str, str, int], Histogram]
+    phases: dict[tuple[str, str], Histogram]
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.latency = {}
+        self.phases = {}
+
+    def begin(self):
+        return _phases.set({})
+
+    def end(
+        self,
+        token: Token[Optional[dict[str, float]]],
+        route: str,
+        method: str,
+        status: int,
+        elapsed: float,
+    ):
+        timings = _phases.get() or {}
+        _phases.reset(token)
+
+        if (histogram := self.latency.get(key := (route, method, status))) is None:
+            histogram = self.latency[key] = Histogram(self.buckets)
+        histogram.observe(elapsed)
+
+        for name, value in timings.items():
+            if (histogram := self.phases.get(pkey := (route, name))) is None:
+                histogram = self.phases[pkey] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def render(self):
+        return render_histograms(
+            "stock_api_request_duration_seconds",
+            "Time spent handling the requests",
+            (
+                ({"route": route, "method": method, "status": str(status)}, histogram)
+                for (route, method, status), histogram in self.latency.items()
+            ),
+        ) + render_histograms(
+            "stock_api_request_phase_duration_seconds",
+            "Time spent in each phase of the requests",
+            (
+                ({"route": route, "phase": name}, histogram)
+                for (route, name), histogram in self.phases.items()
+            ),
+        )
+
+
+@contextmanager
+def phase(name: str):
+    """Adds the time spent in the block to the `name` phase of the current request"""
+    if (timings := _phases.get()) is None:
+        yield
+        return
+
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + perf_counter() - start
+
+
+def count_queries():
+    """Starts counting the statements executed by the current request"""
+    return _queries.set(QueryCounter())
+
+
+def stop_counting_queries(token: Token[Optional[QueryCounter]]):
+    counter = _queries.get() or QueryCounter()
+    _queries.reset(token)
+    return counter
+
+
+def current_queries():
+    return _queries.get()
+
+
+def timed(name: str):
+    """Times every call of the decorated coroutine function as the `name` phase"""
+
+    def _timed[**Spec, T](
+        func: Callable[Spec, Coroutine[Any, Any, T]],
+    ) -> Callable[Spec, Coroutine[Any, Any, T]]:
+        @wraps(func)
+        async def wrapper(*args: Spec.args, **kwargs: Spec.kwargs) -> T:
+            with phase(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return _timed
+
+
+def _format_labels(labels: Labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            key,
+            str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"),
+        )
+        for key, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_samples(name: str, kind: str, help: str, samples: Iterable[Sample]):
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    lines.extend(
+        f"{name}{_format_labels(labels)} {_format_value(value)}"
+        for labels, value in samples
+    )
+    return lines
+
+
+def render_histograms(
+    name: str, help: str, histograms: Iterable[tuple[Labels, Histogram]]
+):
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+    for labels, histogram in histograms:
+        for bound, count in histogram.cumulative():
+            bucket = {**labels, "le": _format_value(bound)}
+            lines.append(f"{name}_bucket{_format_labels(bucket)} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum!r}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+    return lines
@@ -1,15 +1,29 @@
-from typing import TYPE_CHECKING, Literal
+from typing import TYPE_CHECKING, Any, Literal, Optional
 
 from quart import Quart
 
 if TYPE_CHECKING:
-    from src.application.ports import SqlDBPort
+    from shared.cache import TTLCache
+    from shared.heavy_hitters import HeavyHitters
+    from shared.metrics import RequestMetrics
+    from src.application.ports import (
+        HistoryWriterPort,
+        ProxyPort,
+        SqlDBPort,
+        UserIdentity,
+    )
 
 type EnvChoices = Literal["development", "testing", "staging", "production"]
 
 
 class _State:
     db: "SqlDBPort"
+    proxy: "ProxyPort"
+    users_cache: "TTLCache[str, UserIdentity]"
+    tokens_cache: "TTLCache[bytes, Any]"
+    heavy_hitters: "HeavyHitters[str]"
+    writer: Optional["HistoryWriterPort"]
+    metrics: Optional["RequestMetrics"]
 
 
 class ASGIApp(Quart):
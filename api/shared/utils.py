@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 from decimal import Decimal
 from functools import lru_cache
-from typing import Literal, overload
+from typing import Literal, Sequence, overload
 
 from environs import Env
 from uuid_extensions import uuid7  # type: ignore
@@ -51,3 +51,22 @@ def to_fixed(
 def to_fixed(n: float | Decimal, places: int = 2, as_float: bool = True):
     fixed = f"{n:.{places}f}"
     return float(fixed) if as_float else fixed
+
+
+@lru_cache
+def _quantum(places: int):
+    return Decimal(1).scaleb(-places)
+
+
+def to_fixed_many(values: Sequence[float | Decimal], places: int = 2) -> list[float]:
+    """
+    Same as calling `to_fixed` on every value, but a column of Decimals is quantized
+    instead of formatted into a string and parsed back, which rounds it the same way
+    (half to even) in a fraction of the time
+    """
+    quantum = _quantum(places)
+    try:
+        return [float(value.quantize(quantum)) for value in values]  # type: ignore
+    except AttributeError:
+        spec = f".{places}f"
+        return [float(format(value, spec)) for value in values]
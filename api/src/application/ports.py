@@ -1,7 +1,18 @@
 from abc import ABCMeta, abstractmethod
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from datetime import datetime
-from typing import TYPE_CHECKING, AsyncContextManager, Sequence, TypedDict
+from decimal import Decimal
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TypedDict,
+)
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
@@ -15,6 +26,13 @@ class StockStat(TypedDict):
     times_requested: int
 
 
+@dataclass(frozen=True, slots=True)
+class UserIdentity:
+    id: int
+    uuid: str
+    is_superuser: bool
+
+
 class StockDetails(TypedDict):
     symbol: str
     name: str
@@ -26,10 +44,34 @@ class StockDetails(TypedDict):
     volume: int
 
 
+class StockRecord(StockDetails):
+    user_id: int
+
+
+class StockHistoryRow(NamedTuple):
+    id: int
+    created_at: datetime
+    stock_datetime: datetime
+    name: str
+    symbol: str
+    open: Decimal
+    high: Decimal
+    low: Decimal
+    close: Decimal
+
+
 class SqlDBPort(metaclass=ABCMeta):
     @abstractmethod
     async def connect(
-        self, echo_sql: bool = False, pool_size: int = 5, max_overflow: int = 5
+        self,
+        echo_sql: bool = False,
+        pool_size: int = 5,
+        max_overflow: int = 5,
+        read_pool_size: Optional[int] = None,
+        read_max_overflow: Optional[int] = None,
+        pool_timeout: float = 30.0,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
     ) -> None: ...
 
     @abstractmethod
@@ -37,11 +79,19 @@ class SqlDBPort(metaclass=ABCMeta):
 
     @abstractmethod
     @asynccontextmanager  # type: ignore
-    async def begin_session(self) -> AsyncContextManager["AsyncSession"]: ...
+    async def begin_session(
+        self, readonly: bool = False
+    ) -> AsyncContextManager["AsyncSession"]: ...
 
     @abstractmethod
     async def ping(self) -> None: ...
 
+    @abstractmethod
+    def pool_stats(self) -> dict[str, dict[str, Any]]: ...
+
+    @abstractmethod
+    def query_stats(self) -> dict[str, Any]: ...
+
     @abstractmethod
     async def migrate(
         self, base_model: "type[DeclarativeBase]", drop: bool = False
@@ -69,10 +119,22 @@ class StocksRepoPort(metaclass=ABCMeta):
     def __init__(self, session: "AsyncSession") -> None: ...
 
     @abstractmethod
-    async def get_stocks_history(self, user_id: int) -> Sequence["Stock"]: ...
+    async def get_stocks_history(
+        self,
+        user_id: int,
+        limit: Optional[int] = None,
+        after: Optional[tuple[datetime, int]] = None,
+    ) -> Sequence[StockHistoryRow]: ...
+
+    @abstractmethod
+    def stream_stocks_history(
+        self, user_id: int, chunk_size: int = 500
+    ) -> AsyncIterator[StockHistoryRow]: ...
 
     @abstractmethod
-    async def get_most_requested_stocks(self, up_to: int = 5) -> list[StockStat]: ...
+    async def get_most_requested_stocks(
+        self, up_to: int = 5, since: Optional[datetime] = None
+    ) -> list[StockStat]: ...
 
     @abstractmethod
     async def create(
@@ -88,7 +150,45 @@ class StocksRepoPort(metaclass=ABCMeta):
         user_id: int,
     ) -> "Stock": ...
 
+    @abstractmethod
+    async def bulk_create(self, records: Sequence[StockRecord]) -> None: ...
+
+    @abstractmethod
+    async def backfill_request_counts(self) -> int: ...
+
+
+class HistoryWriterPort(metaclass=ABCMeta):
+    @abstractmethod
+    async def start(self) -> None: ...
+
+    @abstractmethod
+    async def stop(self) -> None: ...
+
+    @abstractmethod
+    async def enqueue(self, records: Sequence[StockRecord]) -> None: ...
+
+    @abstractmethod
+    def stats(self) -> dict[str, int | float]: ...
+
 
 class ProxyPort(metaclass=ABCMeta):
+    @abstractmethod
+    async def connect(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 5.0,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+    ) -> None: ...
+
+    @abstractmethod
+    async def disconnect(self) -> None: ...
+
     @abstractmethod
     async def fetch_details_for_stock(self, stock: str) -> StockDetails | None: ...
+
+    @abstractmethod
+    async def fetch_details_for_stocks(
+        self, stocks: Sequence[str]
+    ) -> dict[str, StockDetails | None] | None: ...
@@ -1,16 +1,42 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from dataclasses import dataclass
-from datetime import timedelta
+from datetime import datetime, timedelta
+from functools import lru_cache
+from hashlib import sha256
 from math import floor
-from typing import TYPE_CHECKING, Any, Optional, TypedDict, cast
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Optional,
+    Sequence,
+    TypedDict,
+    cast,
+)
 
 import jwt
+from anyio import CapacityLimiter, to_process, to_thread
 from bcrypt import checkpw, gensalt, hashpw
 
 from conf import settings
-from shared.utils import to_fixed, utc_timestamp
+from shared.cache import TTLCache
+from shared.heavy_hitters import WINDOW_SECONDS, WINDOWS, HeavyHitters, Window
+from shared.metrics import phase
+from shared.utils import to_fixed, to_fixed_many, utc_timestamp
 
 from .exceptions import JWTError, ServiceException
-from .ports import ProxyPort, StocksRepoPort, UsersRepoPort
+from .ports import (
+    HistoryWriterPort,
+    ProxyPort,
+    StockHistoryRow,
+    StockRecord,
+    StocksRepoPort,
+    StockStat,
+    UserIdentity,
+    UsersRepoPort,
+)
 
 if TYPE_CHECKING:
     from src.domain.models import User
@@ -21,27 +47,50 @@ if TYPE_CHECKING:
         exp: int
 
 
+class HistoryPage(TypedDict):
+    items: list[dict[str, Any]]
+    next_cursor: Optional[str]
+
+
+@lru_cache(maxsize=1)
+def _get_hashing_limiter():
+    return CapacityLimiter(settings.PASSWORD_HASHING_MAX_WORKERS)
+
+
+async def _run_hashing[*Args, T](func: Callable[[*Args], T], *args: *Args) -> T:
+    # NOTE: bcrypt is slow on purpose and releases the GIL, so it runs on a worker
+    # instead of blocking the event loop for every other in-flight request
+    limiter = _get_hashing_limiter()
+    if settings.PASSWORD_HASHING_EXECUTOR == "process":
+        return await to_process.run_sync(func, *args, limiter=limiter)
+    return await to_thread.run_sync(func, *args, limiter=limiter)
+
+
 @dataclass
 class AuthService:
     repo: UsersRepoPort
+    users_cache: Optional[TTLCache[str, UserIdentity]] = None
+    tokens_cache: Optional[TTLCache[bytes, "Payload"]] = None
 
     async def create(self, username: str, password: str, is_superuser: bool = False):
         if (await self.repo.get_by_username(username=username)) is not None:
             raise ServiceException(message="Username is already taken", code=400)
 
-        return await self.repo.create(
+        user = await self.repo.create(
             username=username,
-            hashed_password=self._hash_password(raw=password),
+            hashed_password=await self._hash_password(raw=password),
             is_superuser=is_superuser,
         )
 
+        return user
+
     async def login(self, username: str, password: str):
         if (user := await self.repo.get_by_username(username=username)) is None:
             raise ServiceException(
                 message="Username or password are incorrect", code=400
             )
 
-        if not self._verify_password(raw=password, hashed=user.password):
+        if not await self._verify_password(raw=password, hashed=user.password):
             raise ServiceException(
                 message="Username or password are incorrect", code=400
             )
@@ -49,12 +98,67 @@ class AuthService:
         return self._generate_jwt(uuid=user.uuid)
 
     async def authenticate(self, token: str):
+        return await self._get_user(subject=self._get_subject(token=token))
+
+    async def identify(self, token: str):
+        """
+        Same as `authenticate`, but only returns the fields that the services need.
+        Those are kept in `users_cache`, when set, so that authenticated requests do
+        not have to query the users table every time.
+        """
+        with phase("jwt"):
+            subject = self._get_subject(token=token)
+
+        if self.users_cache is not None:
+            if (identity := self.users_cache.get(subject)) is not None:
+                return identity
+
+        with phase("user_lookup"):
+            user = await self._get_user(subject=subject)
+        identity = UserIdentity(
+            id=user.id, uuid=user.uuid, is_superuser=user.is_superuser
+        )
+
+        if self.users_cache is not None:
+            self.users_cache.set(subject, identity)
+
+        return identity
+
+    def invalidate(self, uuid: str):
+        """
+        Drops the cached identity of the user, if any. Creating a user needs no
+        invalidation, as no identity can be cached for it yet, but any future path
+        that updates or deletes a user (e.g. `is_superuser` or the account itself)
+        must call this so that `identify` does not keep serving the old identity.
+        """
+        if self.users_cache is not None:
+            self.users_cache.invalidate(uuid)
+
+    def _get_subject(self, token: str):
         try:
-            payload = self._validate_jwt(token=token)
+            return self._get_payload(token=token)["sub"]
         except JWTError as exc:
             raise ServiceException(message=exc.message, code=401)
 
-        if (user := await self.repo.get_by_id(payload["sub"])) is None:
+    def _get_payload(self, token: str):
+        if self.tokens_cache is None:
+            return self._validate_jwt(token=token)
+
+        # NOTE: Tokens are kept by their hash and only until they expire, so the
+        # signature of a token is verified once per worker instead of every request
+        key = sha256(token.encode()).digest()
+        if (payload := self.tokens_cache.get(key)) is not None:
+            return payload
+
+        payload = self._validate_jwt(token=token)
+        self.tokens_cache.set(
+            key, payload, ttl=payload["exp"] - utc_timestamp(unix=True)
+        )
+
+        return payload
+
+    async def _get_user(self, subject: str):
+        if (user := await self.repo.get_by_id(subject)) is None:
             raise ServiceException(message="User not found", code=404)
 
         return user
@@ -92,19 +196,21 @@ class AuthService:
         except jwt.InvalidTokenError:
             raise JWTError(message="Token is invalid")
 
-    def _hash_password(self, raw: str):
-        return hashpw(password=raw.encode(), salt=gensalt()).decode()
+    async def _hash_password(self, raw: str):
+        return (await _run_hashing(hashpw, raw.encode(), gensalt())).decode()
 
-    def _verify_password(self, raw: str, hashed: str):
-        return checkpw(password=raw.encode(), hashed_password=hashed.encode())
+    async def _verify_password(self, raw: str, hashed: str):
+        return await _run_hashing(checkpw, raw.encode(), hashed.encode())
 
 
 @dataclass
 class StockService:
     stocks_repo: StocksRepoPort
     proxy: Optional[ProxyPort] = None
+    heavy_hitters: Optional[HeavyHitters[str]] = None
+    writer: Optional[HistoryWriterPort] = None
 
-    async def get_stock_details(self, stock: str, user: "User"):
+    async def get_stock_details(self, stock: str, user: "User | UserIdentity"):
         if self.proxy is None:
             raise ServiceException(
                 message="You need to pass a proxy adapter for this function", code=500
@@ -116,34 +222,205 @@ class StockService:
                 code=424,
             )
 
-        instance = await self.stocks_repo.create(**details, user_id=user.id)
+        if self.writer is not None:
+            await self.writer.enqueue(
+                [cast(StockRecord, {**details, "user_id": user.id})]
+            )
+        else:
+            await self.stocks_repo.create(**details, user_id=user.id)
+
+        if self.heavy_hitters is not None:
+            self.heavy_hitters.add(details["symbol"])
 
         return {
-            "symbol": instance.symbol,
-            "company_name": instance.name,
-            "quote": to_fixed(instance.close),
+            "symbol": details["symbol"],
+            "company_name": details["name"],
+            "quote": to_fixed(details["close"]),
         }
 
-    async def get_history(self, user: "User"):
-        data = cast(list[dict[str, Any]], [])
-        if history := await self.stocks_repo.get_stocks_history(user_id=user.id):
-            for entry in history:
-                data.append(
-                    {
-                        "date": entry.stock_datetime.strftime("%Y-%m-%d %H:%M:%S"),
-                        "name": entry.name,
-                        "symbol": entry.symbol,
-                        "open": to_fixed(entry.open),
-                        "high": to_fixed(entry.high),
-                        "low": to_fixed(entry.low),
-                        "close": to_fixed(entry.close),
-                    }
+    async def get_stocks_details(
+        self, stocks: Sequence[str], user: "User | UserIdentity"
+    ):
+        if self.proxy is None:
+            raise ServiceException(
+                message="You need to pass a proxy adapter for this function", code=500
+            )
+
+        if len(stocks) > settings.MAX_STOCKS_PER_REQUEST:
+            raise ServiceException(
+                message=(
+                    f"At most {settings.MAX_STOCKS_PER_REQUEST} stocks can be "
+                    "requested at once"
+                ),
+                code=400,
+            )
+
+        if (details := await self.proxy.fetch_details_for_stocks(stocks)) is None:
+            raise ServiceException(
+                message="Could not fetch the details for the stocks. Try again later",
+                code=424,
+            )
+
+        found = [entry for entry in details.values() if entry is not None]
+        records = [cast(StockRecord, {**entry, "user_id": user.id}) for entry in found]
+        if self.writer is not None:
+            await self.writer.enqueue(records)
+        else:
+            await self.stocks_repo.bulk_create(records)
+        if self.heavy_hitters is not None:
+            self.heavy_hitters.add_many(entry["symbol"] for entry in found)
+
+        return {
+            "stocks": [
+                {
+                    "symbol": entry["symbol"],
+                    "company_name": entry["name"],
+                    "quote": quote,
+                }
+                for entry, quote in zip(
+                    found, to_fixed_many([entry["close"] for entry in found])
                 )
-        return data
+            ],
+            "not_found": [symbol for symbol, entry in details.items() if entry is None],
+        }
+
+    async def get_history(self, user: "User | UserIdentity"):
+        history = await self.stocks_repo.get_stocks_history(user_id=user.id)
+        return self._to_history_entries(history)
+
+    async def stream_history(
+        self, user: "User | UserIdentity", chunk_size: int = 500
+    ) -> AsyncIterator[dict[str, Any]]:
+        chunk: list[StockHistoryRow] = []
+        async for entry in self.stocks_repo.stream_stocks_history(
+            user_id=user.id, chunk_size=chunk_size
+        ):
+            chunk.append(entry)
+            if len(chunk) >= chunk_size:
+                for item in self._to_history_entries(chunk):
+                    yield item
+                chunk.clear()
+
+        for item in self._to_history_entries(chunk):
+            yield item
+
+    async def get_history_page(
+        self,
+        user: "User | UserIdentity",
+        limit: int = settings.HISTORY_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ):
+        if not 0 < limit <= settings.HISTORY_MAX_PAGE_SIZE:
+            raise ServiceException(
+                message=(
+                    f"The limit must be between 1 and {settings.HISTORY_MAX_PAGE_SIZE}"
+                ),
+                code=400,
+            )
 
-    async def get_stats(self, user: "User"):
+        # NOTE: Fetches one extra row to know whether there is a next page or not
+        history = await self.stocks_repo.get_stocks_history(
+            user_id=user.id,
+            limit=limit + 1,
+            after=self._decode_cursor(cursor) if cursor else None,
+        )
+
+        return cast(
+            HistoryPage,
+            {
+                "items": self._to_history_entries(history[:limit]),
+                "next_cursor": (
+                    self._encode_cursor(history[limit - 1])
+                    if len(history) > limit
+                    else None
+                ),
+            },
+        )
+
+    async def get_stats(
+        self, user: "User | UserIdentity", up_to: int = 5, window: Window = "all"
+    ) -> list[StockStat]:
         if not user.is_superuser:
             raise ServiceException(
                 message="User is not allowed to access this service", code=403
             )
-        return await self.stocks_repo.get_most_requested_stocks(up_to=5)
+
+        if not 0 < up_to <= settings.STATS_MAX_UP_TO:
+            raise ServiceException(
+                message=f"The up_to must be between 1 and {settings.STATS_MAX_UP_TO}",
+                code=400,
+            )
+
+        if window not in WINDOWS:
+            raise ServiceException(
+                message=f"The window must be one of: {', '.join(WINDOWS)}", code=400
+            )
+
+        if self.heavy_hitters is None:
+            since = None
+            if window != "all":
+                since = utc_timestamp(unix=False) - timedelta(
+                    seconds=WINDOW_SECONDS[window]
+                )
+            return await self.stocks_repo.get_most_requested_stocks(
+                up_to=up_to, since=since
+            )
+
+        if self.heavy_hitters.should_reconcile(settings.STATS_RECONCILE_INTERVAL):
+            await self.reconcile_stats()
+
+        return [
+            {"stock": stock, "times_requested": times}
+            for stock, times in self.heavy_hitters.top(up_to, window=window)
+        ]
+
+    async def reconcile_stats(self):
+        if self.heavy_hitters is None:
+            return
+
+        # NOTE: Replaces the approximate all time counters with the exact ones, which
+        # also accounts for the requests served by other processes
+        stats = await self.stocks_repo.get_most_requested_stocks(
+            up_to=self.heavy_hitters.capacity
+        )
+        self.heavy_hitters.reconcile(
+            {stat["stock"]: stat["times_requested"] for stat in stats}
+        )
+
+    async def backfill_stats(self):
+        return await self.stocks_repo.backfill_request_counts()
+
+    def _to_history_entries(
+        self, history: Sequence[StockHistoryRow]
+    ) -> list[dict[str, Any]]:
+        # NOTE: The quotes are rounded a whole column at a time
+        opens = to_fixed_many([entry.open for entry in history])
+        highs = to_fixed_many([entry.high for entry in history])
+        lows = to_fixed_many([entry.low for entry in history])
+        closes = to_fixed_many([entry.close for entry in history])
+
+        return [
+            {
+                "date": entry.stock_datetime.isoformat(" ", "seconds"),
+                "name": entry.name,
+                "symbol": entry.symbol,
+                "open": open,
+                "high": high,
+                "low": low,
+                "close": close,
+            }
+            for entry, open, high, low, close in zip(
+                history, opens, highs, lows, closes
+            )
+        ]
+
+    def _encode_cursor(self, entry: StockHistoryRow):
+        raw = json.dumps([entry.created_at.isoformat(), entry.id])
+        return urlsafe_b64encode(raw.encode()).decode()
+
+    def _decode_cursor(self, cursor: str):
+        try:
+            created_at, id = json.loads(urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(created_at), int(id)
+        except Exception:
+            raise ServiceException(message="The cursor is invalid", code=400)
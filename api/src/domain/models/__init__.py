@@ -1,3 +1,3 @@
 from .users import User  # noqa
-from .stocks import Stock  # noqa
+from .stocks import Stock, SymbolRequestCount  # noqa
 from .base import TimeStampedBaseModel as BaseModel  # noqa
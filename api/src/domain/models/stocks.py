@@ -36,3 +36,19 @@ class Stock(TimeStampedBaseModel):
         sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE")
     )
     user: Mapped["User"] = relationship(back_populates="stocks")
+
+
+# NOTE: Serves the history of a user, newest first, and its keyset pagination
+sa.Index(
+    "ix_stocks_user_id_created_at_id",
+    Stock.user_id,
+    Stock.created_at.desc(),
+    Stock.id,
+)
+
+
+class SymbolRequestCount(TimeStampedBaseModel):
+    __tablename__ = "symbol_request_counts"
+
+    symbol: Mapped[str] = mapped_column(sa.String(10), unique=True)
+    times_requested: Mapped[int] = mapped_column(sa.Integer, default=0, index=True)
@@ -1,6 +1,6 @@
 from contextlib import asynccontextmanager
 from functools import lru_cache
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from conf import settings
 from src.application.ports import SqlDBPort
@@ -12,35 +12,64 @@ if TYPE_CHECKING:
 
 
 @lru_cache(typed=True)
-def _get_database(connection_string: str):
-    return Database(connection_string, always_commit=settings.autocommit)
+def _get_database(connection_string: str, read_connection_string: Optional[str]):
+    return Database(
+        connection_string,
+        always_commit=settings.autocommit,
+        sqlite_pragmas=settings.sqlite_pragmas,
+        read_connection_string=read_connection_string,
+        slow_query_threshold=settings.SLOW_QUERY_THRESHOLD or None,
+    )
 
 
 class SqlDBAdapter(SqlDBPort):
-    def __init__(self, connection_string: str):
-        self._database = _get_database(connection_string)
+    def __init__(
+        self, connection_string: str, read_connection_string: Optional[str] = None
+    ):
+        self._database = _get_database(connection_string, read_connection_string)
 
     @property
     def database(self):
         return self._database
 
     async def connect(
-        self, echo_sql: bool = False, pool_size: int = 5, max_overflow: int = 5
+        self,
+        echo_sql: bool = False,
+        pool_size: int = 5,
+        max_overflow: int = 5,
+        read_pool_size: Optional[int] = None,
+        read_max_overflow: Optional[int] = None,
+        pool_timeout: float = 30.0,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
     ):
         await self.database.connect(
-            echo_sql=echo_sql, pool_size=pool_size, max_overflow=max_overflow
+            echo_sql=echo_sql,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            read_pool_size=read_pool_size,
+            read_max_overflow=read_max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping,
         )
 
     async def disconnect(self):
         await self.database.disconnect()
 
     @asynccontextmanager
-    async def begin_session(self):
-        async with self.database.begin_session() as session:
+    async def begin_session(self, readonly: bool = False):
+        async with self.database.begin_session(readonly=readonly) as session:
             yield session
 
     async def ping(self):  # pragma: no cover
         await self.database.ping()
 
+    def pool_stats(self):
+        return self.database.pool_stats()
+
+    def query_stats(self):
+        return self.database.query_stats()
+
     async def migrate(self, base_model: "type[DeclarativeBase]", drop: bool = False):
         await self.database.migrate(base_model=base_model, drop=drop)
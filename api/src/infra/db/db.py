@@ -1,9 +1,16 @@
 import gc
 from contextlib import asynccontextmanager
-from typing import TYPE_CHECKING, Any, Optional
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Mapping, Optional, Sequence, cast
 
-from sqlalchemy import text
+from loguru import logger
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import Pool, QueuePool
+
+from shared.metrics import QueryCounter, current_queries
+
+from .pool import InstrumentedQueuePool
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
@@ -12,16 +19,33 @@ if TYPE_CHECKING:
 
 class Database:
     _connection_string: str
+    _read_connection_string: Optional[str]
     _always_commit: bool
+    _sqlite_pragmas: Mapping[str, str | int]
 
     _engine: Optional["AsyncEngine"]
+    _read_engine: Optional["AsyncEngine"]
     _start_db_session: Optional[async_sessionmaker["AsyncSession"]]
+    _start_read_db_session: Optional[async_sessionmaker["AsyncSession"]]
     _active_sessions: set["AsyncSession"]
     _is_connected: bool
+    _slow_query_threshold: Optional[float]
+    _query_stats: QueryCounter
 
-    def __init__(self, connection_string: str, always_commit: bool = True):
+    def __init__(
+        self,
+        connection_string: str,
+        always_commit: bool = True,
+        sqlite_pragmas: Optional[Mapping[str, str | int]] = None,
+        read_connection_string: Optional[str] = None,
+        slow_query_threshold: Optional[float] = None,
+    ):
         self._connection_string = connection_string
+        self._read_connection_string = read_connection_string
         self._always_commit = always_commit
+        self._sqlite_pragmas = sqlite_pragmas or {"foreign_keys": "ON"}
+        self._slow_query_threshold = slow_query_threshold
+        self._query_stats = QueryCounter()
         self._set_defaults()
 
     @property
@@ -30,12 +54,24 @@ class Database:
             raise ValueError("'_engine' is None. Can not proceed")
         return self._engine
 
+    @property
+    def read_engine(self):
+        if self._read_engine is None:
+            raise ValueError("'_read_engine' is None. Can not proceed")
+        return self._read_engine
+
     @property
     def start_db_session(self):
         if self._start_db_session is None:
             raise ValueError("'_start_db_session' is None. Can not proceed")
         return self._start_db_session
 
+    @property
+    def start_read_db_session(self):
+        if self._start_read_db_session is None:
+            raise ValueError("'_start_read_db_session' is None. Can not proceed")
+        return self._start_read_db_session
+
     @property
     def active_sessions(self):
         return self._active_sessions
@@ -44,26 +80,68 @@ class Database:
     def using_sqlite(self):
         return self._connection_string.startswith("sqlite")
 
+    @property
+    def using_sqlite_file(self):
+        return self.using_sqlite and ":memory:" not in self._connection_string
+
     async def connect(
-        self, echo_sql: bool = False, pool_size: int = 5, max_overflow: int = 5
+        self,
+        echo_sql: bool = False,
+        pool_size: int = 5,
+        max_overflow: int = 5,
+        read_pool_size: Optional[int] = None,
+        read_max_overflow: Optional[int] = None,
+        pool_timeout: float = 30.0,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
     ):
         if self._is_connected:
             return
 
-        kws: dict[str, Any] = dict()
-        if self.using_sqlite:
-            kws["connect_args"] = {"check_same_thread": False}
-        else:
-            kws["pool_size"] = pool_size
-            kws["max_overflow"] = max_overflow
+        pool_options: dict[str, Any] = dict(
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping,
+        )
+
+        read_pool_size = pool_size if read_pool_size is None else read_pool_size
+        read_max_overflow = (
+            max_overflow if read_max_overflow is None else read_max_overflow
+        )
+
+        # NOTE: SQLite allows a single writer at a time, so the writes go through one
+        # connection, queueing in the pool instead of failing with "database is
+        # locked", while the reads get a pool of their own, which WAL lets run
+        # alongside the writer
+        if self.using_sqlite_file:
+            pool_size, max_overflow = 1, 0
 
-        self._engine = create_async_engine(
-            url=self._connection_string, echo=echo_sql, **kws
+        self._engine = self._create_engine(
+            url=self._connection_string,
+            echo_sql=echo_sql,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            **pool_options,
         )
 
+        if self._read_connection_string or self.using_sqlite_file:
+            self._read_engine = self._create_engine(
+                url=self._read_connection_string or self._connection_string,
+                echo_sql=echo_sql,
+                pool_size=read_pool_size,
+                max_overflow=read_max_overflow,
+                readonly=True,
+                **pool_options,
+            )
+        else:
+            self._read_engine = self._engine
+
         self._start_db_session = async_sessionmaker(
             self.engine, autoflush=False, autocommit=False, expire_on_commit=False
         )
+        self._start_read_db_session = async_sessionmaker(
+            self.read_engine, autoflush=False, autocommit=False, expire_on_commit=False
+        )
 
         await self._check_connection()
 
@@ -74,13 +152,18 @@ class Database:
         try:
             [await session.close() for session in self.active_sessions]
             await self.engine.dispose()
+            if self.read_engine is not self.engine:
+                await self.read_engine.dispose()
         finally:
             self._set_defaults(cleanup=True)
 
     @asynccontextmanager
-    async def begin_session(self):
+    async def begin_session(self, readonly: bool = False):
         self._validate_connection()
-        async with self.start_db_session() as session:
+        start_session = (
+            self.start_read_db_session if readonly else self.start_db_session
+        )
+        async with start_session() as session:
             self.active_sessions.add(session)
             try:
                 yield session
@@ -88,7 +171,7 @@ class Database:
                 await session.rollback()
                 raise exc
             else:
-                if self._always_commit:
+                if self._always_commit and not readonly:
                     await session.commit()
             finally:
                 self.active_sessions.remove(session)
@@ -108,11 +191,111 @@ class Database:
                 await conn.run_sync(base_model.metadata.drop_all)
             await conn.run_sync(base_model.metadata.create_all)
 
-            # NOTE: This option has to be enabled in order to use foreign key
-            # constraints for sqlite. Check:
+    def _create_engine(
+        self,
+        url: str,
+        echo_sql: bool,
+        pool_size: int,
+        max_overflow: int,
+        pool_timeout: float,
+        pool_recycle: int,
+        pool_pre_ping: bool,
+        readonly: bool = False,
+    ):
+        kws: dict[str, Any] = dict(
+            poolclass=InstrumentedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping,
+        )
+        if url.startswith("sqlite"):
+            kws["connect_args"] = {"check_same_thread": False}
+            if ":memory:" in url:
+                # NOTE: Each connection would get a database of its own, so the
+                # default single connection pool is kept
+                kws = dict(connect_args=kws["connect_args"])
+
+        engine = create_async_engine(url=url, echo=echo_sql, **kws)
+        self._instrument(engine)
+
+        if url.startswith("sqlite"):
+            pragmas = {
+                **self._sqlite_pragmas,
+                **({"query_only": "ON"} if readonly else {}),
+            }
+
+            # NOTE: Pragmas like 'foreign_keys' (needed to enforce foreign key
+            # constraints) are per connection, so they are set on every new one. Check:
             # https://docs.sqlalchemy.org/en/20/dialects/sqlite.html#foreign-key-support
-            if self.using_sqlite:
-                await conn.execute(text("PRAGMA foreign_keys=ON"))
+            @event.listens_for(engine.sync_engine, "connect")
+            def _set_pragmas(dbapi_connection: Any, _: Any):  # type: ignore
+                cursor = dbapi_connection.cursor()
+                for name, value in pragmas.items():
+                    cursor.execute(f"PRAGMA {name}={value}")
+                cursor.close()
+
+        return engine
+
+    def _instrument(self, engine: "AsyncEngine"):
+        """
+        Times every statement and adds it to the totals of this instance and, when it
+        is being counted (see `shared.metrics.count_queries`), of the current request.
+        Statements slower than `slow_query_threshold` are logged, without the values
+        of their parameters.
+        """
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def _start_timer(  # type: ignore
+            conn: Any,
+            cursor: Any,
+            statement: str,
+            parameters: Any,
+            context: Any,
+            executemany: bool,
+        ):
+            context._query_start = perf_counter()
+
+        @event.listens_for(engine.sync_engine, "after_cursor_execute")
+        def _stop_timer(  # type: ignore
+            conn: Any,
+            cursor: Any,
+            statement: str,
+            parameters: Any,
+            context: Any,
+            executemany: bool,
+        ):
+            elapsed = perf_counter() - context._query_start
+            slow = (
+                self._slow_query_threshold is not None
+                and elapsed >= self._slow_query_threshold
+            )
+
+            self._query_stats.record(elapsed, slow=slow)
+            if (counter := current_queries()) is not None:
+                counter.record(elapsed, slow=slow)
+
+            if slow:
+                logger.warning(
+                    f"Slow query ({elapsed:.3f}s): {statement} "
+                    f"{_redact(parameters, executemany)}"
+                )
+
+    def query_stats(self):
+        return {
+            "queries": self._query_stats.count,
+            "seconds": self._query_stats.seconds,
+            "slow": self._query_stats.slow,
+        }
+
+    def pool_stats(self) -> dict[str, dict[str, Any]]:
+        self._validate_connection()
+        engines = {"write": self.engine}
+        if self.read_engine is not self.engine:
+            engines["read"] = self.read_engine
+
+        return {name: _pool_snapshot(engine.pool) for name, engine in engines.items()}
 
     def _validate_connection(self):
         if not self._is_connected:
@@ -128,9 +311,38 @@ class Database:
 
     def _set_defaults(self, cleanup: bool = False):
         self._engine = None
+        self._read_engine = None
         self._start_db_session = None
+        self._start_read_db_session = None
         self._active_sessions = set()
         self._is_connected = False
 
         if cleanup:
             gc.collect()
+
+
+def _pool_snapshot(pool: Pool) -> dict[str, Any]:
+    """Whatever the pool class keeps track of, nothing for a `StaticPool` and alike"""
+    if isinstance(pool, InstrumentedQueuePool):
+        return pool.snapshot()
+    if isinstance(pool, QueuePool):
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+        }
+    return {}
+
+
+def _redact(parameters: Any, executemany: bool = False) -> str:
+    """Describes the parameters of a statement by their types only"""
+    if executemany:
+        rows: Sequence[Any] = parameters or []
+        return f"[{_redact(rows[0]) if rows else ''} x {len(rows)}]"
+    if isinstance(parameters, Mapping):
+        named = cast(Mapping[str, Any], parameters)
+        return str({key: type(value).__name__ for key, value in named.items()})
+    if isinstance(parameters, Sequence) and not isinstance(parameters, str):
+        positional = cast(Sequence[Any], parameters)
+        return str(tuple(type(value).__name__ for value in positional))
+    return type(parameters).__name__
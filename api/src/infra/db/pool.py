@@ -0,0 +1,52 @@
+from dataclasses import asdict, dataclass
+from time import perf_counter
+from typing import Any
+
+from sqlalchemy import AsyncAdaptedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+
+@dataclass
+class PoolStats:
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    max_wait_seconds: float = 0.0
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that also tracks how long the checkouts wait and how many time out"""
+
+    stats: PoolStats
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats  # type: ignore
+        return pool
+
+    def snapshot(self):
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            **asdict(self.stats),
+        }
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            waited = perf_counter() - start
+            self.stats.wait_seconds_total += waited
+            self.stats.max_wait_seconds = max(self.stats.max_wait_seconds, waited)
+
+        self.stats.checkouts += 1
+        return connection
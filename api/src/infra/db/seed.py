@@ -0,0 +1,202 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from random import Random
+from time import perf_counter, time
+from typing import Any, Callable, Optional, cast
+
+from bcrypt import gensalt, hashpw
+from sqlalchemy import Table, func, insert, select
+
+from shared.utils import generate_uuid
+from src.domain.models import Stock, User
+from src.infra.repository.stocks import StocksRepo
+
+from .db import Database
+
+
+_COLUMNS = (
+    "uuid",
+    "symbol",
+    "name",
+    "stock_datetime",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "user_id",
+    "created_at",
+    "updated_at",
+)
+_SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+@dataclass
+class SeedSummary:
+    users: int
+    rows: int
+    symbols: int
+    first_user_id: int
+    seconds: float
+
+
+def zipf_weights(n: int, exponent: float):
+    """Weight of each rank, from the hottest to the coldest, of a Zipf distribution"""
+    return [1 / rank**exponent for rank in range(1, n + 1)]
+
+
+def symbol_for(rank: int):
+    return f"S{rank:05d}.US"
+
+
+def _uuid7(unix_ms: int, random_bits: int):
+    """
+    Same layout as `shared.utils.generate_uuid`, but from the given timestamp and 74
+    random bits, which is several times faster when generating millions of them
+    """
+    head = f"{unix_ms & 0xFFFF_FFFF_FFFF:012x}"
+    tail = f"{(random_bits >> 12) | 0x8000_0000_0000_0000:016x}"
+    return f"{head[:8]}-{head[8:]}-7{random_bits & 0xFFF:03x}-{tail[:4]}-{tail[4:]}"
+
+
+async def seed(
+    db: Database,
+    users: int,
+    rows: int,
+    symbols: int = 500,
+    zipf_exponent: float = 1.1,
+    heavy_share: float = 0.0,
+    batch_size: int = 50_000,
+    password: str = "password",
+    random_seed: int = 42,
+    drop_indexes: bool = True,
+    on_batch: Optional[Callable[[int], Any]] = None,
+):
+    """
+    Creates `users` users, all of them with the same `password`, and `rows` quotes in
+    their histories, one second apart. Symbols are drawn from a Zipf distribution, so
+    that a few of them are hot, and users uniformly, except for the first seeded user
+    who gets `heavy_share` of all the rows. Rows are inserted with Core executemany in
+    batches of `batch_size`, one transaction each, and `on_batch` is called with the
+    rows inserted so far after every one of them. Unless `drop_indexes` is unset, the
+    secondary indexes of the history are dropped while loading and built again at the
+    end, which is a lot cheaper than updating them row by row.
+    """
+    started = perf_counter()
+    rnd = Random(random_seed)
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    # NOTE: Hashed once, hashing it for every user would dominate the seeding
+    hashed_password = hashpw(password.encode(), gensalt()).decode()
+
+    # NOTE: The ids are left to the database, so that sequences, as PostgreSQL's, move
+    # past them, and the max id only keeps the usernames apart between runs
+    async with db.engine.begin() as conn:
+        offset = (await conn.scalar(select(func.max(User.id))) or 0) + 1
+        user_ids = list(
+            await conn.scalars(
+                insert(User).returning(User.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "uuid": generate_uuid(),
+                        "username": f"seed{idx}",
+                        "password": hashed_password,
+                        "is_superuser": False,
+                        "created_at": start,
+                        "updated_at": start,
+                    }
+                    for idx in range(offset, offset + users)
+                ],
+            )
+        )
+
+    first_user_id = user_ids[0]
+    ranks = range(symbols)
+    cum_weights = list(accumulate(zipf_weights(symbols, zipf_exponent)))
+    prices = [
+        (price, round(price * 1.02, 2), round(price * 0.98, 2), round(price * 1.01, 2))
+        for price in (round(rnd.uniform(5, 500), 2) for _ in ranks)
+    ]
+
+    indexes = [
+        index
+        for index in cast(Table, Stock.__table__).indexes
+        if drop_indexes and not index.unique
+    ]
+    async with db.engine.begin() as conn:
+        for index in indexes:
+            await conn.run_sync(index.drop)
+
+    # NOTE: SQLite rows skip the bind processors of SQLAlchemy and go straight to the
+    # driver, with the datetimes already in the format that SQLAlchemy stores them
+    sqlite = db.using_sqlite
+    raw_insert = (
+        f"INSERT INTO {Stock.__tablename__} ({', '.join(_COLUMNS)}) "
+        f"VALUES ({', '.join('?' * len(_COLUMNS))})"
+    )
+    symbol_names = [(symbol_for(rank), f"STOCK {rank}") for rank in ranks]
+    uuid_epoch = int(time() * 1000)
+
+    try:
+        for offset in range(0, rows, batch_size):
+            size = min(batch_size, rows - offset)
+            drawn = rnd.choices(ranks, cum_weights=cum_weights, k=size)
+            batch: list[tuple[Any, ...]] = []
+
+            for idx, rank in zip(range(offset, offset + size), drawn):
+                created_at = start + timedelta(seconds=idx)
+                timestamp = (
+                    created_at.strftime(_SQLITE_DATETIME_FORMAT)
+                    if sqlite
+                    else created_at
+                )
+                symbol, name = symbol_names[rank]
+                opening, high, low, close = prices[rank]
+                batch.append(
+                    (
+                        _uuid7(uuid_epoch + idx, rnd.getrandbits(74)),
+                        symbol,
+                        name,
+                        timestamp if sqlite else created_at.replace(tzinfo=None),
+                        opening,
+                        high,
+                        low,
+                        close,
+                        rnd.randint(1_000, 50_000_000),
+                        (
+                            first_user_id
+                            if rnd.random() < heavy_share
+                            else rnd.choice(user_ids)
+                        ),
+                        timestamp,
+                        timestamp,
+                    )
+                )
+
+            async with db.engine.begin() as conn:
+                if sqlite:
+                    await conn.exec_driver_sql(raw_insert, batch)
+                else:
+                    await conn.execute(
+                        insert(Stock), [dict(zip(_COLUMNS, row)) for row in batch]
+                    )
+
+            if on_batch is not None:
+                on_batch(offset + size)
+    finally:
+        async with db.engine.begin() as conn:
+            for index in indexes:
+                await conn.run_sync(index.create)
+
+    async with db.begin_session() as session:
+        await StocksRepo(session=session).backfill_request_counts()
+        await session.commit()
+
+    return SeedSummary(
+        users=users,
+        rows=rows,
+        symbols=symbols,
+        first_user_id=first_user_id,
+        seconds=perf_counter() - started,
+    )
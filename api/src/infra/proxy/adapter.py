@@ -1,13 +1,17 @@
 from datetime import datetime
-from functools import wraps
-from typing import Awaitable, Callable, Literal, cast
+from functools import lru_cache, wraps
+from typing import Any, Awaitable, Callable, Literal, Sequence, cast
+from urllib.parse import urlencode
 
 from anyio import sleep
 from httpx import AsyncClient, Response
 
 from conf import settings
+from shared.metrics import timed
 from src.application.ports import ProxyPort, StockDetails
 
+from .client import HTTPClient
+
 
 class FetchException(Exception):
     def __init__(self, message: str):
@@ -49,14 +53,14 @@ def retry(times: int, delay: int):
 
 @retry(times=2, delay=1)
 async def fetch(
-    method: Literal["GET"], url: str, expected_status_codes: tuple[int, ...]
+    client: AsyncClient,
+    method: Literal["GET"],
+    url: str,
+    expected_status_codes: tuple[int, ...],
 ):
-    async with AsyncClient() as client:
-        func: Callable[[str], Awaitable[Response]] = getattr(
-            client, method.lower().strip()
-        )
+    func: Callable[[str], Awaitable[Response]] = getattr(client, method.lower().strip())
 
-        response = await func(url)
+    response = await func(url)
 
     if response.status_code in expected_status_codes:
         return response
@@ -66,9 +70,39 @@ async def fetch(
     )
 
 
+@lru_cache(typed=True)
+def _get_client(base_url: str):
+    return HTTPClient(base_url)
+
+
 class ProxyAdapter(ProxyPort):
-    API_URL = settings.PROXY_URl
+    def __init__(self, base_url: str = settings.PROXY_URl):
+        self._client = _get_client(base_url)
+
+    @property
+    def client(self):
+        return self._client
+
+    async def connect(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 5.0,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+    ):
+        await self.client.connect(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+            timeout=timeout,
+            connect_timeout=connect_timeout,
+        )
+
+    async def disconnect(self):
+        await self.client.disconnect()
 
+    @timed("proxy")
     async def fetch_details_for_stock(self, stock: str):
         response, err = await self._make_request(
             method="GET", endpoint=f"details/{stock}"
@@ -77,8 +111,28 @@ class ProxyAdapter(ProxyPort):
         if err:
             return
 
-        details = response.json()
+        return self._to_stock_details(response.json())
 
+    @timed("proxy")
+    async def fetch_details_for_stocks(self, stocks: Sequence[str]):
+        response, err = await self._make_request(
+            method="GET", endpoint=f"details?{urlencode({'s': ','.join(stocks)})}"
+        )
+
+        if err:
+            return
+
+        data = response.json()
+
+        details: dict[str, StockDetails | None] = {
+            symbol: self._to_stock_details(entry)
+            for symbol, entry in data["results"].items()
+        }
+        details.update({symbol: None for symbol in data["errors"]})
+
+        return details
+
+    def _to_stock_details(self, details: dict[str, Any]):
         return cast(
             StockDetails,
             {
@@ -101,11 +155,12 @@ class ProxyAdapter(ProxyPort):
         endpoint: str,
         expected_status_codes: tuple[int, ...] = (200,),
     ):
-        url = f"{self.API_URL}/{endpoint}"
-
         try:
             response = await fetch(
-                method=method, url=url, expected_status_codes=expected_status_codes
+                client=self.client.client,
+                method=method,
+                url=endpoint,
+                expected_status_codes=expected_status_codes,
             )
         except Exception as exc:
             return cast(Response, None), exc
@@ -0,0 +1,67 @@
+import gc
+from typing import Optional
+
+from httpx import AsyncClient, Limits, Timeout
+
+
+class HTTPClient:
+    _base_url: str
+
+    _client: Optional[AsyncClient]
+    _is_connected: bool
+
+    def __init__(self, base_url: str):
+        self._base_url = base_url
+        self._set_defaults()
+
+    @property
+    def client(self):
+        if self._client is None:
+            raise ValueError("'_client' is None. Can not proceed")
+        return self._client
+
+    @property
+    def base_url(self):
+        return self._base_url
+
+    @property
+    def is_connected(self):
+        return self._is_connected
+
+    async def connect(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 5.0,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+    ):
+        if self._is_connected:
+            return
+
+        self._client = AsyncClient(
+            base_url=self._base_url,
+            limits=Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=Timeout(timeout, connect=connect_timeout),
+        )
+        self._is_connected = True
+
+    async def disconnect(self):
+        if not self._is_connected:
+            return
+
+        try:
+            await self.client.aclose()
+        finally:
+            self._set_defaults(cleanup=True)
+
+    def _set_defaults(self, cleanup: bool = False):
+        self._client = None
+        self._is_connected = False
+
+        if cleanup:
+            gc.collect()
@@ -1,44 +1,88 @@
+from collections import Counter
 from dataclasses import dataclass
 from datetime import datetime
-from typing import cast
+from typing import Optional, Sequence, cast
 
-from sqlalchemy import func, select
+from sqlalchemy import and_, delete, func, insert, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.application.ports import StocksRepoPort, StockStat
-from src.domain.models import Stock
+from shared.metrics import timed
+from shared.utils import utc_timestamp
+from src.application.ports import (
+    StockHistoryRow,
+    StockRecord,
+    StocksRepoPort,
+    StockStat,
+)
+from src.domain.models import Stock, SymbolRequestCount
 
 
 @dataclass
 class StocksRepo(StocksRepoPort):
     session: AsyncSession
 
-    async def get_stocks_history(self, user_id: int):
-        stmt = (
-            select(Stock)
-            .where(Stock.user_id == user_id)
-            .order_by(Stock.created_at.desc())
-        )
-        return (await self.session.scalars(stmt)).all()
-
-    async def get_most_requested_stocks(self, up_to: int = 5):
-        stmt = (
-            select(Stock.symbol, func.count(Stock.symbol).label("times"))
-            .group_by(Stock.symbol)
-            .order_by(func.count(Stock.symbol).desc())
-            .limit(up_to)
+    @timed("repository")
+    async def get_stocks_history(
+        self,
+        user_id: int,
+        limit: Optional[int] = None,
+        after: Optional[tuple[datetime, int]] = None,
+    ):
+        # NOTE: Matches the 'ix_stocks_user_id_created_at_id' index, so that pages
+        # are read straight from it, no matter how deep the cursor is
+        stmt = self._history_stmt(user_id=user_id)
+
+        if after is not None:
+            created_at, id = after
+            stmt = stmt.where(
+                or_(
+                    Stock.created_at < created_at,
+                    and_(Stock.created_at == created_at, Stock.id > id),
+                )
+            )
+
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        return cast(Sequence[StockHistoryRow], (await self.session.execute(stmt)).all())
+
+    async def stream_stocks_history(self, user_id: int, chunk_size: int = 500):
+        # NOTE: Rows are read through a server-side cursor, 'chunk_size' at a time,
+        # instead of loading the whole history into memory at once
+        stmt = self._history_stmt(user_id=user_id).execution_options(
+            yield_per=chunk_size
         )
 
-        result = (await self.session.execute(stmt)).all()
-        data = cast(list[StockStat], [])
+        async for row in await self.session.stream(stmt):
+            yield cast(StockHistoryRow, row)
 
-        for row in result:
-            tpl = row._tuple()  # type: ignore
-            stock, times = tpl[0], tpl[1]
-            data.append({"stock": stock, "times_requested": times})
+    @timed("repository")
+    async def get_most_requested_stocks(
+        self, up_to: int = 5, since: Optional[datetime] = None
+    ):
+        if since is None:
+            # NOTE: Reads the top of the index on 'times_requested' instead of
+            # grouping the whole 'stocks' table on every call
+            stmt = (
+                select(SymbolRequestCount.symbol, SymbolRequestCount.times_requested)
+                .order_by(SymbolRequestCount.times_requested.desc())
+                .limit(up_to)
+            )
+        else:
+            stmt = (
+                select(Stock.symbol, func.count(Stock.id).label("times"))
+                .where(Stock.created_at >= since)
+                .group_by(Stock.symbol)
+                .order_by(func.count(Stock.id).desc())
+                .limit(up_to)
+            )
 
-        return data
+        return [
+            cast(StockStat, {"stock": stock, "times_requested": times})
+            for stock, times in await self.session.execute(stmt)
+        ]
 
+    @timed("repository")
     async def create(
         self,
         symbol: str,
@@ -64,4 +108,65 @@ class StocksRepo(StocksRepoPort):
         )
         self.session.add(instance=instance)
         await self.session.flush()
+        await self._increment_request_counts(Counter([symbol]))
         return instance
+
+    @timed("repository")
+    async def bulk_create(self, records: Sequence[StockRecord]):
+        if not records:
+            return
+
+        # NOTE: A single executemany, which SQLAlchemy batches into
+        # 'INSERT ... VALUES (...), (...)' statements
+        await self.session.execute(insert(Stock), list(records))
+        await self._increment_request_counts(
+            Counter(record["symbol"] for record in records)
+        )
+
+    @timed("repository")
+    async def backfill_request_counts(self):
+        stmt = select(Stock.symbol, func.count(Stock.symbol)).group_by(Stock.symbol)
+        counts = Counter(
+            {symbol: times for symbol, times in (await self.session.execute(stmt))}
+        )
+
+        await self.session.execute(delete(SymbolRequestCount))
+        await self._increment_request_counts(counts)
+        return len(counts)
+
+    def _history_stmt(self, user_id: int):
+        # NOTE: Only the columns of 'StockHistoryRow', read as plain rows, which
+        # skips the identity map and the instance state of the ORM
+        return (
+            select(*(getattr(Stock, field) for field in StockHistoryRow._fields))
+            .where(Stock.user_id == user_id)
+            .order_by(Stock.created_at.desc(), Stock.id)
+        )
+
+    async def _increment_request_counts(self, counts: Counter[str]):
+        if not counts:
+            return
+
+        # NOTE: Only the dialect in use is imported, the postgresql one alone takes
+        # longer to import than the rest of the repository
+        if self.session.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+
+        # NOTE: Sorted, so that concurrent transactions lock the rows in the same order
+        stmt = upsert(SymbolRequestCount).values(
+            [
+                {"symbol": symbol, "times_requested": times}
+                for symbol, times in sorted(counts.items())
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SymbolRequestCount.symbol],
+            set_={
+                "times_requested": SymbolRequestCount.times_requested
+                + stmt.excluded.times_requested,
+                "updated_at": utc_timestamp(unix=False),
+            },
+        )
+        await self.session.execute(stmt)
@@ -0,0 +1 @@
+from .adapter import HistoryWriterAdapter  # noqa
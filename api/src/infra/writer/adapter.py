@@ -0,0 +1,166 @@
+import asyncio
+from time import perf_counter
+from typing import Optional, Sequence, cast
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.application.ports import HistoryWriterPort, SqlDBPort, StockRecord
+from src.infra.repository.stocks import StocksRepo
+
+
+class HistoryWriterAdapter(HistoryWriterPort):
+    """
+    Write-behind buffer for the stocks history. Records are put into a bounded queue
+    and a background task inserts them in batches of up to `batch_size`, waiting at
+    most `flush_interval` seconds for a batch to fill up. When the queue is full,
+    `enqueue` waits for room, which slows the callers down instead of dropping rows.
+    A batch that fails to be written is retried up to `max_retries` times, waiting
+    `retry_backoff` seconds before the first retry and twice as long before each of
+    the next ones, and only dropped after that.
+    """
+
+    _queue: asyncio.Queue[Optional[StockRecord]]
+    _task: Optional[asyncio.Task[None]]
+
+    def __init__(
+        self,
+        db: SqlDBPort,
+        max_size: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        max_retries: int = 3,
+        retry_backoff: float = 0.1,
+    ):
+        self._db = db
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue = asyncio.Queue(maxsize=max_size)
+        self._task = None
+
+        self.enqueued = 0
+        self.flushed = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        self.blocked = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    @property
+    def is_running(self):
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if not self.is_running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        # NOTE: The sentinel goes after everything that was already enqueued, so all
+        # of it is written before the task finishes
+        if self.is_running:
+            await self._queue.put(None)
+
+        try:
+            await self._task
+        finally:
+            self._task = None
+
+    async def enqueue(self, records: Sequence[StockRecord]):
+        if not self.is_running:
+            raise RuntimeError("The history writer is not running")
+
+        for record in records:
+            if self._queue.full():
+                self.blocked += 1
+            await self._queue.put(record)
+            self.enqueued += 1
+
+    def stats(self):
+        return {
+            "depth": self.depth,
+            "max_size": self.max_size,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "batches": self.batches,
+            "blocked": self.blocked,
+            "last_flush_seconds": self.last_flush_seconds,
+            "max_flush_seconds": self.max_flush_seconds,
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            if (record := await self._queue.get()) is None:
+                break
+
+            batch = [record]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    if (timeout := deadline - loop.time()) <= 0:
+                        break
+                    try:
+                        record = await asyncio.wait_for(self._queue.get(), timeout)
+                    except TimeoutError:
+                        break
+
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[StockRecord]):
+        start = perf_counter()
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    await self._write(batch)
+                except Exception:
+                    if attempt == self.max_retries:
+                        self.failed += len(batch)
+                        logger.exception(
+                            f"Failed to write {len(batch)} history records, "
+                            f"dropping them after {attempt} retries"
+                        )
+                        return
+
+                    delay = self.retry_backoff * 2**attempt
+                    self.retries += 1
+                    logger.warning(
+                        f"Failed to write {len(batch)} history records, "
+                        f"retrying in {delay:.2f}s"
+                    )
+                    await asyncio.sleep(delay)
+                else:
+                    self.flushed += len(batch)
+                    self.batches += 1
+                    return
+        finally:
+            self.last_flush_seconds = perf_counter() - start
+            self.max_flush_seconds = max(
+                self.max_flush_seconds, self.last_flush_seconds
+            )
+
+    async def _write(self, batch: list[StockRecord]):
+        async with self._db.begin_session() as session:  # type: ignore
+            await StocksRepo(session=cast(AsyncSession, session)).bulk_create(batch)
@@ -1,20 +1,39 @@
 from dataclasses import dataclass
 from functools import partial
+from time import perf_counter
+from typing import Any, Optional
 
 from loguru import logger
-from quart import Quart
+from quart import Quart, Response, g, request
 
 from conf import settings
-from src.application.ports import SqlDBPort
+from shared.cache import TTLCache
+from shared.heavy_hitters import HeavyHitters
+from shared.metrics import RequestMetrics, count_queries, stop_counting_queries
+from src.application.ports import (
+    HistoryWriterPort,
+    ProxyPort,
+    SqlDBPort,
+    UserIdentity,
+)
 from src.infra.db import SqlDBAdapter
+from src.infra.proxy import ProxyAdapter
+from src.infra.writer import HistoryWriterAdapter
 
 from .handlers import get_handlers
 from .routers import get_routers
+from .serializers import get_json_provider_class
 
 
 @dataclass
 class State:
     db: SqlDBPort
+    proxy: ProxyPort
+    users_cache: TTLCache[str, UserIdentity]
+    tokens_cache: TTLCache[bytes, Any]
+    heavy_hitters: HeavyHitters[str]
+    writer: Optional[HistoryWriterPort] = None
+    metrics: Optional[RequestMetrics] = None
 
 
 class ASGIFactory:
@@ -24,7 +43,33 @@ class ASGIFactory:
 
     def __init__(self):
         self.application = Quart(__name__)
-        self.application.state = State(db=SqlDBAdapter(settings.DATABASE_URL))  # type: ignore
+        self.application.json = get_json_provider_class()(self.application)
+        db = SqlDBAdapter(settings.DATABASE_URL, settings.DATABASE_READ_URL)
+        self.application.state = State(  # type: ignore
+            db=db,
+            proxy=ProxyAdapter(settings.PROXY_URl),
+            users_cache=TTLCache(
+                max_size=settings.USERS_CACHE_MAX_SIZE, ttl=settings.USERS_CACHE_TTL
+            ),
+            # NOTE: Entries expire along with their tokens, hence the infinite ttl
+            tokens_cache=TTLCache(
+                max_size=settings.TOKENS_CACHE_MAX_SIZE, ttl=float("inf")
+            ),
+            heavy_hitters=HeavyHitters(capacity=settings.STATS_TRACKER_CAPACITY),
+            writer=(
+                HistoryWriterAdapter(
+                    db=db,
+                    max_size=settings.HISTORY_WRITER_MAX_SIZE,
+                    batch_size=settings.HISTORY_WRITER_BATCH_SIZE,
+                    flush_interval=settings.HISTORY_WRITER_FLUSH_INTERVAL,
+                    max_retries=settings.HISTORY_WRITER_MAX_RETRIES,
+                    retry_backoff=settings.HISTORY_WRITER_RETRY_BACKOFF,
+                )
+                if settings.HISTORY_WRITE_BEHIND
+                else None
+            ),
+            metrics=RequestMetrics() if settings.REQUEST_METRICS_ENABLED else None,
+        )
         self._connected = False
 
         for error in (handlers := get_handlers()):
@@ -33,6 +78,14 @@ class ASGIFactory:
         for router in get_routers():
             self.application.register_blueprint(router)
 
+        if (metrics := self.application.state.metrics) is not None:  # type: ignore
+            self.application.before_request(partial(self._start_timer, metrics))
+            self.application.after_request(partial(self._stop_timer, metrics))
+
+        if settings.expose_query_count:
+            self.application.before_request(self._start_query_count)
+            self.application.after_request(self._stop_query_count)
+
         self.application.before_serving(
             partial(self._on_startup, self.application.state)  # type: ignore
         )
@@ -42,15 +95,63 @@ class ASGIFactory:
 
     async def _on_startup(self, state: State):
         if not self._connected:
-            await state.db.connect()
-            self._connected = True
+            await state.db.connect(
+                pool_size=settings.DATABASE_POOL_SIZE,
+                max_overflow=settings.DATABASE_MAX_OVERFLOW,
+                read_pool_size=settings.DATABASE_READ_POOL_SIZE,
+                read_max_overflow=settings.DATABASE_READ_MAX_OVERFLOW,
+                pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+                pool_recycle=settings.DATABASE_POOL_RECYCLE,
+                pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+            )
             logger.info("Connected to the database")
+            await state.proxy.connect(
+                max_connections=settings.PROXY_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.PROXY_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.PROXY_KEEPALIVE_EXPIRY,
+                timeout=settings.PROXY_TIMEOUT,
+                connect_timeout=settings.PROXY_CONNECT_TIMEOUT,
+            )
+            logger.info("Connected to the proxy service")
+            if state.writer is not None:
+                await state.writer.start()
+                logger.info("Started the history writer")
+            self._connected = True
+
+    async def _start_timer(self, metrics: RequestMetrics):
+        g.metrics_token = metrics.begin()
+        g.metrics_start = perf_counter()
+
+    async def _stop_timer(self, metrics: RequestMetrics, response: Response):
+        # NOTE: The rule rather than the path, so that the labels stay bounded
+        metrics.end(
+            g.metrics_token,
+            route=request.url_rule.rule if request.url_rule else "<unmatched>",
+            method=request.method,
+            status=response.status_code,
+            elapsed=perf_counter() - g.metrics_start,
+        )
+        return response
+
+    async def _start_query_count(self):
+        g.queries_token = count_queries()
+
+    async def _stop_query_count(self, response: Response):
+        queries = stop_counting_queries(g.queries_token)
+        response.headers["X-Query-Count"] = str(queries.count)
+        response.headers["X-Query-Time"] = f"{queries.seconds * 1000:.3f}ms"
+        return response
 
     async def _on_shutdown(self, state: State):
         if self._connected:
+            if state.writer is not None:
+                await state.writer.stop()
+                logger.info(f"Stopped the history writer: {state.writer.stats()}")
+            await state.proxy.disconnect()
+            logger.info("Disconnected from the proxy service")
             await state.db.disconnect()
-            self._connected = False
             logger.info("Disconnected from the database")
+            self._connected = False
 
 
 app = ASGIFactory.new()
@@ -1,51 +1,116 @@
 from functools import wraps
-from typing import TYPE_CHECKING, Awaitable, Callable, cast
+from hmac import compare_digest
+from typing import AsyncIterator, Awaitable, Callable, cast
 
 from quart import Blueprint as Router
-from quart import current_app, request
+from quart import Response, current_app, request
+from quart.typing import ResponseReturnValue
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from conf import settings
+from shared.heavy_hitters import Window
+from shared.metrics import Sample, render_samples
 from shared.types import ASGIApp
 from src.application.exceptions import ServiceException
+from src.application.ports import UserIdentity
 from src.application.services import AuthService, StockService
-from src.infra.proxy import ProxyAdapter
 from src.infra.repository.stocks import StocksRepo
 from src.infra.repository.users import UsersRepo
 
-if TYPE_CHECKING:
-    from src.domain.models import User
+router = Router("stocks", __name__)
+metrics_router = Router("metrics", __name__)
 
+_PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
 
-router = Router("stocks", __name__)
+# NOTE: Fields of `SqlDBPort.pool_stats` and `HistoryWriterPort.stats`, by metric name
+_POOL_METRICS = {
+    "size": ("size", "gauge", "Connections kept open by the pool"),
+    "checked_out": ("checked_out", "gauge", "Connections checked out of the pool"),
+    "overflow": ("overflow", "gauge", "Connections open beyond the pool size"),
+    "checkouts_total": ("checkouts", "counter", "Checkouts from the pool"),
+    "timeouts_total": ("timeouts", "counter", "Checkouts that timed out"),
+    "wait_seconds_total": (
+        "wait_seconds_total",
+        "counter",
+        "Time spent waiting for a connection",
+    ),
+    "max_wait_seconds": ("max_wait_seconds", "gauge", "Longest checkout wait"),
+}
+_WRITER_METRICS = {
+    "queue_depth": ("depth", "gauge", "Entries waiting to be written"),
+    "queue_max_size": ("max_size", "gauge", "Entries that can wait to be written"),
+    "enqueued_total": ("enqueued", "counter", "Entries queued"),
+    "flushed_total": ("flushed", "counter", "Entries written"),
+    "failed_total": ("failed", "counter", "Entries that could not be written"),
+    "retries_total": ("retries", "counter", "Batches written again after failing"),
+    "batches_total": ("batches", "counter", "Batches written"),
+    "blocked_total": ("blocked", "counter", "Entries that waited for queue space"),
+    "last_flush_seconds": ("last_flush_seconds", "gauge", "Duration of last batch"),
+    "max_flush_seconds": ("max_flush_seconds", "gauge", "Longest batch duration"),
+}
+
+
+def _get_int_arg(name: str, default: int):
+    if (value := request.args.get(name)) is None:
+        return default
 
+    try:
+        return int(value)
+    except ValueError:
+        raise ServiceException(
+            message=f"The '{name}' query param must be an integer", code=400
+        ) from None
 
-def login_required[T](func: Callable[[AsyncSession, "User"], Awaitable[T]]):
-    @wraps(func)
-    async def wrapper[**Spec](*args: Spec.args, **kwargs: Spec.kwargs) -> T:
-        app = cast(ASGIApp, current_app)
-        token = request.headers.get("Authorization", "").replace("Bearer ", "")
 
-        async with app.state.db.begin_session() as ses:  # type: ignore
-            session = cast(AsyncSession, ses)
-            svc = AuthService(repo=UsersRepo(session=session))
+def login_required(readonly: bool = False):
+    """
+    Authenticates the request and hands a session and the user to the handler. Read
+    only handlers should set `readonly`, so that they are served by the read pool
+    """
 
-            try:
-                user = await svc.authenticate(token=token)
-            except ServiceException as exc:
-                return cast(T, ({"detail": exc.message}, exc.code))
+    def decorator[T](func: Callable[[AsyncSession, UserIdentity], Awaitable[T]]):
+        @wraps(func)
+        async def wrapper[**Spec](*args: Spec.args, **kwargs: Spec.kwargs) -> T:
+            app = cast(ASGIApp, current_app)
+            token = request.headers.get("Authorization", "").replace("Bearer ", "")
 
-            return await func(session, user, *args, **kwargs)
+            # NOTE: The user is looked up in a session of its own, which is closed,
+            # releasing its connection, before the handler runs
+            async with app.state.db.begin_session(readonly=True) as ses:  # type: ignore
+                svc = AuthService(
+                    repo=UsersRepo(session=cast(AsyncSession, ses)),
+                    users_cache=app.state.users_cache,
+                    tokens_cache=app.state.tokens_cache,
+                )
 
-    return wrapper
+                try:
+                    user = await svc.identify(token=token)
+                except ServiceException as exc:
+                    return cast(T, ({"detail": exc.message}, exc.code))
+
+            # NOTE: Sessions only check out a connection on their first query, so
+            # handlers hold none while they wait on the proxy service
+            async with app.state.db.begin_session(readonly=readonly) as ses:  # type: ignore
+                return await func(cast(AsyncSession, ses), user, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
 
 
 @router.get("/stock")
-@login_required
-async def get_stock_details(session: AsyncSession, user: "User"):
+@login_required()
+async def get_stock_details(session: AsyncSession, user: UserIdentity):
     if not (stock := request.args.get("q")):
         return {"detail": "The 'q' query param must be set"}, 400
 
-    svc = StockService(proxy=ProxyAdapter(), stocks_repo=StocksRepo(session=session))
+    app = cast(ASGIApp, current_app)
+    svc = StockService(
+        proxy=app.state.proxy,
+        stocks_repo=StocksRepo(session=session),
+        heavy_hitters=app.state.heavy_hitters,
+        writer=app.state.writer,
+    )
 
     if details := await svc.get_stock_details(stock=stock, user=user):
         return details, 200
@@ -53,23 +118,199 @@ async def get_stock_details(session: AsyncSession, user: "User"):
     return {"detail": "No details found for this stock"}, 404
 
 
+@router.get("/stocks")
+@login_required()
+async def get_stocks_details(session: AsyncSession, user: UserIdentity):
+    stocks = [stock for stock in request.args.get("q", "").split(",") if stock.strip()]
+    if not stocks:
+        return {"detail": "The 'q' query param must be set"}, 400
+
+    app = cast(ASGIApp, current_app)
+    svc = StockService(
+        proxy=app.state.proxy,
+        stocks_repo=StocksRepo(session=session),
+        heavy_hitters=app.state.heavy_hitters,
+        writer=app.state.writer,
+    )
+
+    return await svc.get_stocks_details(stocks=stocks, user=user), 200
+
+
+def _stream_history(user: UserIdentity, fmt: str) -> AsyncIterator[str]:
+    app = cast(ASGIApp, current_app._get_current_object())  # type: ignore
+    chunk_size = settings.HISTORY_STREAM_CHUNK_SIZE
+
+    # NOTE: The body is sent after the handler returns, when the session opened by
+    # 'login_required' is already closed, so the generator opens its own one
+    async def generate():
+        sep, buffer = "", ["["] if fmt == "json" else []
+        async with app.state.db.begin_session(readonly=True) as ses:  # type: ignore
+            svc = StockService(stocks_repo=StocksRepo(session=cast(AsyncSession, ses)))
+            async for entry in svc.stream_history(user=user, chunk_size=chunk_size):
+                if fmt == "json":
+                    buffer.append(sep + app.json.dumps(entry))
+                    sep = ","
+                else:
+                    buffer.append(app.json.dumps(entry) + "\n")
+
+                if len(buffer) >= chunk_size:
+                    yield "".join(buffer)
+                    buffer.clear()
+
+        if fmt == "json":
+            buffer.append("]")
+        if buffer:
+            yield "".join(buffer)
+
+    return generate()
+
+
 @router.get("/history")
-@login_required
-async def get_history(session: AsyncSession, user: "User"):
+@login_required(readonly=True)
+async def get_history(session: AsyncSession, user: UserIdentity) -> ResponseReturnValue:
+    if fmt := request.args.get("stream"):
+        if fmt not in ("json", "ndjson"):
+            return {"detail": "The 'stream' query param must be json or ndjson"}, 400
+
+        mimetype = "application/json" if fmt == "json" else "application/x-ndjson"
+        return Response(_stream_history(user, fmt), content_type=mimetype), 200
+
     svc = StockService(stocks_repo=StocksRepo(session=session))
+    page = await svc.get_history_page(
+        user=user,
+        limit=_get_int_arg("limit", default=settings.HISTORY_PAGE_SIZE),
+        cursor=request.args.get("cursor"),
+    )
 
-    if history := await svc.get_history(user=user):
-        return history, 200
+    if history := page["items"]:
+        headers = {"X-Next-Cursor": cursor} if (cursor := page["next_cursor"]) else {}
+        return history, 200, headers
 
     return {"detail": "No history found for this user"}, 404
 
 
 @router.get("/stats")
-@login_required
-async def get_stats(session: AsyncSession, user: "User"):
-    svc = StockService(stocks_repo=StocksRepo(session=session))
+@login_required(readonly=True)
+async def get_stats(session: AsyncSession, user: UserIdentity):
+    app = cast(ASGIApp, current_app)
+    svc = StockService(
+        stocks_repo=StocksRepo(session=session), heavy_hitters=app.state.heavy_hitters
+    )
+    stats = await svc.get_stats(
+        user=user,
+        up_to=_get_int_arg("up_to", default=5),
+        window=cast(Window, request.args.get("window", "all")),
+    )
 
-    if stats := await svc.get_stats(user=user):
+    if stats:
         return stats, 200
 
     return {"detail": "No stats are currently available"}, 404
+
+
+@router.get("/pool/stats")
+@login_required(readonly=True)
+async def get_pool_stats(session: AsyncSession, user: UserIdentity):
+    if not user.is_superuser:
+        return {"detail": "User is not allowed to access this service"}, 403
+
+    app = cast(ASGIApp, current_app)
+    return app.state.db.pool_stats(), 200  # type: ignore
+
+
+@metrics_router.get("/metrics")
+async def get_metrics():
+    """Request latencies, caches, connection pools, history writer and top stocks,
+    in the Prometheus text format. The pools and the top stocks are only reported to
+    scrapers that send the `METRICS_TOKEN`, and the endpoint requires it once set"""
+    token = request.headers.get("Authorization", "").replace("Bearer ", "")
+    authorized = settings.METRICS_TOKEN is not None and compare_digest(
+        token.encode(), settings.METRICS_TOKEN.encode()
+    )
+    if settings.METRICS_TOKEN is not None and not authorized:
+        return {"detail": "Invalid metrics token"}, 401
+
+    app = cast(ASGIApp, current_app)
+    state = app.state
+    caches = {"users": state.users_cache, "tokens": state.tokens_cache}
+    queries = state.db.query_stats()
+    writer = state.writer.stats() if state.writer is not None else {}
+
+    families: list[tuple[str, str, str, list[Sample]]] = [
+        (
+            "stock_api_cache_hits_total",
+            "counter",
+            "Cache lookups that found an entry",
+            [({"cache": key}, cache.hits) for key, cache in caches.items()],
+        ),
+        (
+            "stock_api_cache_misses_total",
+            "counter",
+            "Cache lookups that did not find an entry",
+            [({"cache": key}, cache.misses) for key, cache in caches.items()],
+        ),
+        (
+            "stock_api_cache_entries",
+            "gauge",
+            "Entries currently cached",
+            [({"cache": key}, len(cache)) for key, cache in caches.items()],
+        ),
+        (
+            "stock_api_db_queries_total",
+            "counter",
+            "Statements executed",
+            [({}, queries["queries"])],
+        ),
+        (
+            "stock_api_db_query_seconds_total",
+            "counter",
+            "Time spent executing statements",
+            [({}, queries["seconds"])],
+        ),
+        (
+            "stock_api_db_slow_queries_total",
+            "counter",
+            "Statements slower than the slow query threshold",
+            [({}, queries["slow"])],
+        ),
+        *(
+            (f"stock_api_history_writer_{name}", kind, help, [({}, writer[field])])
+            for name, (field, kind, help) in _WRITER_METRICS.items()
+            if field in writer
+        ),
+    ]
+
+    if authorized:
+        pools = state.db.pool_stats()
+        families.extend(
+            (
+                f"stock_api_db_pool_{name}",
+                kind,
+                help,
+                [
+                    ({"pool": pool}, stats[field])
+                    for pool, stats in pools.items()
+                    if field in stats
+                ],
+            )
+            for name, (field, kind, help) in _POOL_METRICS.items()
+        )
+        families.append(
+            (
+                "stock_api_stock_requests",
+                "gauge",
+                "Approximate times that the most requested stocks were requested",
+                [
+                    ({"symbol": symbol}, count)
+                    for symbol, count in state.heavy_hitters.top(
+                        settings.METRICS_TOP_SYMBOLS
+                    )
+                ],
+            )
+        )
+
+    lines = state.metrics.render() if state.metrics is not None else []
+    for name, kind, help, samples in families:
+        lines.extend(render_samples(name, kind, help, samples))
+
+    return "\n".join(lines) + "\n", 200, {"Content-Type": _PROMETHEUS_CONTENT_TYPE}
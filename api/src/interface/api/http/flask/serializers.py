@@ -0,0 +1,63 @@
+from typing import Any, cast
+
+from quart import Response
+from quart.json.provider import DefaultJSONProvider
+
+from conf import settings
+from shared.metrics import phase
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class JSONProvider(DefaultJSONProvider):
+    """The default provider, with the encoding of the responses timed"""
+
+    def response(self, *args: Any, **kwargs: Any):
+        with phase("serialization"):
+            return super().response(*args, **kwargs)
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson. Besides being a lot faster than the stdlib `json`,
+    it encodes datetimes (as ISO 8601), dataclasses and numbers natively, and falls
+    back to the default provider hooks for anything else, like `Decimal`. Keys are
+    kept in insertion order.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self._dumps(obj, indent=bool(kwargs.get("indent"))).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)  # type: ignore
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        # NOTE: Typed after the sansio app of werkzeug, whose responses take no body
+        response_class = cast(type[Response], self._app.response_class)
+        with phase("serialization"):
+            obj = self._prepare_response_obj(args, kwargs)
+            indent = (self.compact is None and self._app.debug) or self.compact is False
+            return response_class(
+                self._dumps(obj, indent=indent, newline=True), mimetype=self.mimetype
+            )
+
+    def _dumps(self, obj: Any, indent: bool = False, newline: bool = False) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS  # type: ignore
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS  # type: ignore
+        if indent:
+            option |= orjson.OPT_INDENT_2  # type: ignore
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE  # type: ignore
+        return orjson.dumps(obj, default=self.default, option=option)  # type: ignore
+
+
+def get_json_provider_class() -> type[DefaultJSONProvider]:
+    if settings.JSON_PROVIDER == "orjson" and orjson is not None:
+        return ORJSONProvider
+    return JSONProvider
@@ -1,15 +1,16 @@
 from contextlib import asynccontextmanager
 from functools import partial, wraps
-from typing import Awaitable, Callable
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
 
 import anyio
-import uvicorn
 from loguru import logger
-from typer import Typer
+from typer import Option, Typer
 
 from conf import settings
-from src.application.services import AuthService
+from src.application.services import AuthService, StockService
 from src.infra.db import SqlDBAdapter
+from src.infra.repository.stocks import StocksRepo
 from src.infra.repository.users import UsersRepo
 
 
@@ -55,8 +56,86 @@ async def login(username: str, password: str):
         logger.info(token)
 
 
+@app.command(name="backfillstats")
+@coroutine
+async def backfill_stats():
+    async with start_session() as session:
+        svc = StockService(stocks_repo=StocksRepo(session=session))
+        symbols = await svc.backfill_stats()
+        logger.info(f"Request counts of {symbols} symbols backfilled successfully!")
+
+
+@app.command(name="seed")
+@coroutine
+async def seed(
+    users: int = Option(1000, min=1),
+    rows: int = Option(1_000_000, min=0),
+    symbols: int = Option(500, min=1),
+    zipf_exponent: float = 1.1,
+    heavy_share: float = 0.0,
+    batch_size: int = Option(50_000, min=1),
+    password: str = "password",
+    drop_indexes: bool = True,
+):
+    from src.infra.db.seed import seed as seed_database
+
+    db = SqlDBAdapter(connection_string=settings.DATABASE_URL)
+    await db.connect()
+    try:
+        summary = await seed_database(
+            db.database,
+            users=users,
+            rows=rows,
+            symbols=symbols,
+            zipf_exponent=zipf_exponent,
+            heavy_share=heavy_share,
+            batch_size=batch_size,
+            password=password,
+            drop_indexes=drop_indexes,
+            on_batch=lambda done: logger.info(f"{done}/{rows} rows inserted"),
+        )
+    finally:
+        await db.disconnect()
+
+    logger.info(
+        f"Seeded {summary.users} users, starting at id {summary.first_user_id}, and "
+        f"{summary.rows} rows in {summary.seconds:.1f}s "
+        f"({summary.rows / summary.seconds:.0f} rows/s)"
+    )
+
+
+@app.command(name="bench")
+def bench(
+    endpoint: list[str] = Option(
+        ["stock", "history", "stats"],
+        help="Any of stock, history and stats, can be repeated",
+    ),
+    requests: int = 1000,
+    concurrency: int = 10,
+    history_rows: int = 1000,
+    proxy_latency: float = 0.0,
+    database_url: Optional[str] = None,
+    output: Optional[Path] = Option(None, help="Also writes the report here"),
+):
+    # NOTE: Imported here, so that the other commands do not load the benchmarks
+    from benchmarks.load import main
+
+    main(
+        endpoint=endpoint,
+        requests=requests,
+        concurrency=concurrency,
+        history_rows=history_rows,
+        proxy_latency=proxy_latency,
+        database_url=database_url,
+        output=output,
+    )
+
+
 @app.command("runserver")
 def runserver():
+    # NOTE: Imported here, so that the other commands do not pay for it
+    import uvicorn
+
     uvicorn.run(
         settings.ASGI_APP,
         host=settings.HOST,
@@ -1,10 +1,15 @@
 from datetime import datetime
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING, Sequence, cast
 
 from bcrypt import gensalt, hashpw
 from pytest import fixture
 
-from src.application.ports import ProxyPort, StockDetails
+from src.application.ports import (
+    HistoryWriterPort,
+    ProxyPort,
+    StockDetails,
+    StockRecord,
+)
 from src.application.services import AuthService, StockService
 from src.domain.models import User
 from src.infra.repository.stocks import StocksRepo
@@ -81,6 +86,17 @@ class BaseFixtures:
 
 
 class ProxyMock(ProxyPort):
+    async def connect(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 5.0,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+    ): ...
+
+    async def disconnect(self): ...
+
     async def fetch_details_for_stock(self, stock: str):
         if stock not in stocks:
             return
@@ -101,3 +117,24 @@ class ProxyMock(ProxyPort):
                 "volume": data["volume"],
             },
         )
+
+    async def fetch_details_for_stocks(self, stocks: Sequence[str]):
+        return {
+            symbol: await self.fetch_details_for_stock(symbol)
+            for symbol in dict.fromkeys(stock.strip().upper() for stock in stocks)
+        }
+
+
+class HistoryWriterMock(HistoryWriterPort):
+    def __init__(self):
+        self.records: list[StockRecord] = []
+
+    async def start(self): ...
+
+    async def stop(self): ...
+
+    async def enqueue(self, records: Sequence[StockRecord]):
+        self.records.extend(records)
+
+    def stats(self) -> dict[str, int | float]:
+        return {"depth": 0}
@@ -1,16 +1,20 @@
-from random import randint
+from random import randint, sample
 from typing import TYPE_CHECKING, Any, TypedDict, cast
 
 import jwt as jwt_lib
 from pytest import mark, raises
-from sqlalchemy import func, select
+from sqlalchemy import delete, func, select
 
+from conf import settings
+from shared.cache import TTLCache
+from shared.heavy_hitters import HeavyHitters
 from shared.utils import to_fixed
 from src.application.exceptions import ServiceException
+from src.application.ports import UserIdentity
 from src.application.services import AuthService, StockService
-from src.domain.models import Stock, User
+from src.domain.models import Stock, SymbolRequestCount, User
 
-from .conftest import BaseFixtures, default_password, stocks
+from .conftest import BaseFixtures, HistoryWriterMock, default_password, stocks
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
@@ -49,7 +53,7 @@ class TestAuthService(BaseFixtures):
         assert user.username == "user"
         assert user.password != "user"
         assert user.is_superuser == is_superuser
-        auth_svc._verify_password(raw="user", hashed=user.password)  # type: ignore
+        await auth_svc._verify_password(raw="user", hashed=user.password)  # type: ignore
 
     async def test_create_user_should_raise_when_the_username_is_already_taken(
         self, auth_svc: AuthService, user: User
@@ -96,6 +100,23 @@ class TestAuthService(BaseFixtures):
         assert logged_user.password == user.password
         assert logged_user.is_superuser == user.is_superuser
 
+    async def test_authenticate_should_cache_verified_tokens(
+        self, auth_svc: AuthService, user: User
+    ):
+        auth_svc.tokens_cache = TTLCache(max_size=10, ttl=float("inf"))
+        jwt = await auth_svc.login(username=user.username, password=default_password)
+
+        for _ in range(3):
+            logged_user = await auth_svc.authenticate(token=jwt)
+            assert logged_user.id == user.id
+
+        with raises(ServiceException):
+            await auth_svc.authenticate(token="token")
+
+        assert len(auth_svc.tokens_cache) == 1
+        assert auth_svc.tokens_cache.hits == 2
+        assert auth_svc.tokens_cache.misses == 2
+
     async def test_authenticate_should_raise_when_an_invalid_token_is_set(
         self, auth_svc: AuthService
     ):
@@ -125,6 +146,34 @@ class TestAuthService(BaseFixtures):
         assert exc_info.value.message == EXPECTED_ERROR_MESSAGE
         assert exc_info.value.code == EXPECTED_ERROR_CODE
 
+    async def test_identify_should_cache_the_user_until_it_is_invalidated(
+        self, auth_svc: AuthService, user: User, session: "AsyncSession"
+    ):
+        EXPECTED_ERROR_MESSAGE = "User not found"
+        EXPECTED_ERROR_CODE = 404
+        expected = UserIdentity(
+            id=user.id, uuid=user.uuid, is_superuser=user.is_superuser
+        )
+        auth_svc.users_cache = TTLCache(max_size=10, ttl=60)
+        jwt = await auth_svc.login(username=user.username, password=default_password)
+
+        identity = await auth_svc.identify(token=jwt)
+        await session.delete(user)
+        await session.flush()
+        cached_identity = await auth_svc.identify(token=jwt)
+
+        assert identity == cached_identity == expected
+        assert auth_svc.users_cache.hits == 1
+        assert auth_svc.users_cache.misses == 1
+
+        auth_svc.invalidate(uuid=expected.uuid)
+        with raises(ServiceException) as exc_info:
+            await auth_svc.identify(token=jwt)
+
+        assert isinstance(exc_info.value, ServiceException)
+        assert exc_info.value.message == EXPECTED_ERROR_MESSAGE
+        assert exc_info.value.code == EXPECTED_ERROR_CODE
+
 
 class TestStockService(BaseFixtures):
     @mark.parametrize(
@@ -196,6 +245,74 @@ class TestStockService(BaseFixtures):
         assert exc_info.value.message == EXPECTED_ERROR_MESSAGE
         assert exc_info.value.code == EXPECTED_ERROR_CODE
 
+    async def test_get_stocks_details(
+        self, stock_svc: StockService, user: User, session: "AsyncSession"
+    ):
+        expected = [
+            {
+                "symbol": stocks[key]["symbol"],
+                "company_name": stocks[key]["name"],
+                "quote": to_fixed(cast(float, stocks[key]["close"])),
+            }
+            for key in stocks
+        ]
+
+        stocks_before = await session.scalar(
+            select(func.count(Stock.id)).where(Stock.user_id == user.id)
+        )
+        details = await stock_svc.get_stocks_details(
+            stocks=[*(key.lower() for key in stocks), "test"], user=user
+        )
+        stocks_after = (
+            await session.scalars(
+                select(Stock).where(Stock.user_id == user.id).order_by(Stock.id)
+            )
+        ).all()
+
+        assert not stocks_before
+        assert details == {"stocks": expected, "not_found": ["TEST"]}
+        assert len(stocks_after) == len(stocks)
+        for instance, entry in zip(stocks_after, expected):
+            assert instance.symbol == entry["symbol"]
+            assert instance.name == entry["company_name"]
+            assert to_fixed(instance.close) == entry["quote"]
+            assert instance.user_id == user.id
+
+    async def test_get_stocks_details_should_enqueue_when_writing_behind(
+        self, stock_svc: StockService, user: User, session: "AsyncSession"
+    ):
+        stock_svc.writer = writer = HistoryWriterMock()
+
+        await stock_svc.get_stock_details(stock="AAPL.US", user=user)
+        await stock_svc.get_stocks_details(stocks=list(stocks), user=user)
+        stocks_after = await session.scalar(
+            select(func.count(Stock.id)).where(Stock.user_id == user.id)
+        )
+
+        assert not stocks_after
+        assert [record["symbol"] for record in writer.records] == [
+            "AAPL.US",
+            *(stocks[key]["symbol"] for key in stocks),
+        ]
+        assert all(record["user_id"] == user.id for record in writer.records)
+
+    async def test_get_stocks_details_should_raise_when_too_many_stocks_are_requested(
+        self, stock_svc: StockService, user: User
+    ):
+        EXPECTED_ERROR_MESSAGE = (
+            f"At most {settings.MAX_STOCKS_PER_REQUEST} stocks can be requested at once"
+        )
+        EXPECTED_ERROR_CODE = 400
+
+        with raises(ServiceException) as exc_info:
+            await stock_svc.get_stocks_details(
+                stocks=["A.US"] * (settings.MAX_STOCKS_PER_REQUEST + 1), user=user
+            )
+
+        assert isinstance(exc_info.value, ServiceException)
+        assert exc_info.value.message == EXPECTED_ERROR_MESSAGE
+        assert exc_info.value.code == EXPECTED_ERROR_CODE
+
     @mark.parametrize(
         argnames="req",
         argvalues=[{"stock": key, "times": randint(2, 10)} for key in stocks],
@@ -235,6 +352,71 @@ class TestStockService(BaseFixtures):
         for entry in history:
             assert entry == expected
 
+    async def test_get_history_page(self, stock_svc: StockService, user: User):
+        for stock in stocks:
+            for _ in range(3):
+                await stock_svc.get_stock_details(stock=stock, user=user)
+
+        history = await stock_svc.get_history(user=user)
+        pages: list[list[dict[str, Any]]] = []
+        cursor = None
+        while True:
+            page = await stock_svc.get_history_page(user=user, limit=2, cursor=cursor)
+            pages.append(page["items"])
+            if (cursor := page["next_cursor"]) is None:
+                break
+
+        assert len(history) == len(stocks) * 3
+        assert len(pages) == len(history) // 2 + len(history) % 2
+        assert all(len(page) == 2 for page in pages[:-1])
+        assert [entry for page in pages for entry in page] == history
+
+    async def test_stream_history(self, stock_svc: StockService, user: User):
+        for stock in stocks:
+            for _ in range(3):
+                await stock_svc.get_stock_details(stock=stock, user=user)
+
+        history = await stock_svc.get_history(user=user)
+        streamed = [
+            entry async for entry in stock_svc.stream_history(user=user, chunk_size=2)
+        ]
+
+        assert len(streamed) == len(stocks) * 3
+        assert streamed == history
+
+    @mark.parametrize(
+        argnames="limit,cursor,expected_message",
+        argvalues=[
+            (
+                0,
+                None,
+                f"The limit must be between 1 and {settings.HISTORY_MAX_PAGE_SIZE}",
+            ),
+            (
+                settings.HISTORY_MAX_PAGE_SIZE + 1,
+                None,
+                f"The limit must be between 1 and {settings.HISTORY_MAX_PAGE_SIZE}",
+            ),
+            (10, "cursor", "The cursor is invalid"),
+        ],
+    )
+    async def test_get_history_page_should_raise_when_params_are_invalid(
+        self,
+        stock_svc: StockService,
+        user: User,
+        limit: int,
+        cursor: str | None,
+        expected_message: str,
+    ):
+        EXPECTED_ERROR_CODE = 400
+
+        with raises(ServiceException) as exc_info:
+            await stock_svc.get_history_page(user=user, limit=limit, cursor=cursor)
+
+        assert isinstance(exc_info.value, ServiceException)
+        assert exc_info.value.message == expected_message
+        assert exc_info.value.code == EXPECTED_ERROR_CODE
+
     async def test_get_stats(
         self,
         stock_svc: StockService,
@@ -242,8 +424,9 @@ class TestStockService(BaseFixtures):
         superuser: User,
     ):
         expected_results: list[dict[str, str | int]] = []
-        for stock in stocks:
-            for _ in range(count := randint(2, 20)):
+        # NOTE: Distinct counts, since the order of ties is not defined
+        for stock, count in zip(stocks, sample(range(2, 21), k=len(stocks))):
+            for _ in range(count):
                 await stock_svc.get_stock_details(stock=stock, user=user)
             expected_results.append({"stock": stock, "times_requested": count})
 
@@ -254,6 +437,82 @@ class TestStockService(BaseFixtures):
         ):
             assert result == expected
 
+    async def test_get_stats_should_serve_from_the_heavy_hitters(
+        self, stock_svc: StockService, user: User, superuser: User
+    ):
+        counts = dict(zip(stocks, sample(range(2, 21), k=len(stocks))))
+        for stock, count in counts.items():
+            for _ in range(count):
+                await stock_svc.get_stock_details(stock=stock, user=user)
+
+        expected_results = [
+            {"stock": stock, "times_requested": count}
+            for stock, count in sorted(counts.items(), key=lambda el: -el[1])[:2]
+        ]
+        stock_svc.heavy_hitters = HeavyHitters(capacity=10)
+
+        # NOTE: The first call reconciles the tracker with the database
+        assert await stock_svc.get_stats(user=superuser, up_to=2) == expected_results
+        assert stock_svc.heavy_hitters.top(1, window="hour") == []
+
+        top_stock = cast(str, expected_results[0]["stock"])
+        await stock_svc.get_stock_details(stock=top_stock, user=user)
+        expected_results[0]["times_requested"] = counts[top_stock] + 1
+
+        assert await stock_svc.get_stats(user=superuser, up_to=2) == expected_results
+        assert await stock_svc.get_stats(user=superuser, up_to=1, window="hour") == [
+            {"stock": top_stock, "times_requested": 1}
+        ]
+
+    @mark.parametrize(
+        argnames="up_to,window,expected_message",
+        argvalues=[
+            (0, "all", f"The up_to must be between 1 and {settings.STATS_MAX_UP_TO}"),
+            (
+                settings.STATS_MAX_UP_TO + 1,
+                "all",
+                f"The up_to must be between 1 and {settings.STATS_MAX_UP_TO}",
+            ),
+            (5, "week", "The window must be one of: all, hour, day"),
+        ],
+    )
+    async def test_get_stats_should_raise_when_params_are_invalid(
+        self,
+        stock_svc: StockService,
+        superuser: User,
+        up_to: int,
+        window: Any,
+        expected_message: str,
+    ):
+        EXPECTED_ERROR_CODE = 400
+
+        with raises(ServiceException) as exc_info:
+            await stock_svc.get_stats(user=superuser, up_to=up_to, window=window)
+
+        assert isinstance(exc_info.value, ServiceException)
+        assert exc_info.value.message == expected_message
+        assert exc_info.value.code == EXPECTED_ERROR_CODE
+
+    async def test_backfill_stats(
+        self,
+        session: "AsyncSession",
+        stock_svc: StockService,
+        user: User,
+        superuser: User,
+    ):
+        for stock in stocks:
+            for _ in range(randint(2, 20)):
+                await stock_svc.get_stock_details(stock=stock, user=user)
+
+        expected_results = await stock_svc.get_stats(user=superuser)
+        await session.execute(delete(SymbolRequestCount))
+
+        assert await stock_svc.get_stats(user=superuser) == []
+        assert await stock_svc.backfill_stats() == len(stocks)
+        assert sorted(
+            await stock_svc.get_stats(user=superuser), key=lambda el: el["stock"]
+        ) == sorted(expected_results, key=lambda el: el["stock"])
+
     async def test_get_stats_should_raise_when_user_is_not_superuser(
         self, stock_svc: StockService, user: User
     ):
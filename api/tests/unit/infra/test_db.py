@@ -0,0 +1,180 @@
+from pathlib import Path
+
+import anyio
+from loguru import logger
+from pytest import fixture, raises
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from conf import settings
+from shared.metrics import count_queries, stop_counting_queries
+from src.domain.models import BaseModel, User
+from src.infra.db.db import Database
+
+
+@fixture
+async def database(tmp_path: Path):
+    db = Database(
+        f"sqlite+aiosqlite:///{tmp_path / 'test.db'}",
+        sqlite_pragmas=settings.sqlite_pragmas,
+    )
+    await db.connect(pool_size=3, max_overflow=0)
+    await db.migrate(base_model=BaseModel)
+    try:
+        yield db
+    finally:
+        await db.disconnect()
+
+
+class TestSQLiteDatabase:
+    async def test_should_set_the_pragmas_on_every_connection(self, database: Database):
+        for readonly in (False, True):
+            async with database.begin_session(readonly=readonly) as session:
+                pragmas = {
+                    name: await session.scalar(text(f"PRAGMA {name}"))
+                    for name in ("journal_mode", "foreign_keys", "busy_timeout")
+                }
+                query_only = await session.scalar(text("PRAGMA query_only"))
+
+            assert pragmas == {
+                "journal_mode": "wal",
+                "foreign_keys": 1,
+                "busy_timeout": settings.SQLITE_BUSY_TIMEOUT,
+            }
+            assert query_only == int(readonly)
+
+    async def test_should_use_a_single_writer_and_a_pool_of_readers(
+        self, database: Database
+    ):
+        assert database.engine.pool.size() == 1  # type: ignore
+        assert database.read_engine.pool.size() == 3  # type: ignore
+
+    async def test_should_not_write_on_read_only_sessions(self, database: Database):
+        with raises(OperationalError):
+            async with database.begin_session(readonly=True) as session:
+                await session.execute(
+                    insert(User), [{"username": "user", "password": "password"}]
+                )
+
+    async def test_should_serialize_concurrent_writes(self, database: Database):
+        async def write(idx: int):
+            async with database.begin_session() as session:
+                await session.execute(
+                    insert(User), [{"username": f"user{idx}", "password": "password"}]
+                )
+
+        async with anyio.create_task_group() as tg:
+            for idx in range(50):
+                tg.start_soon(write, idx)
+
+        async with database.begin_session(readonly=True) as session:
+            assert await session.scalar(select(func.count(User.id))) == 50
+
+
+class TestReadReplica:
+    async def test_should_route_the_reads_to_the_replica(self, tmp_path: Path):
+        primary_url = f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}"
+        replica_url = f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}"
+
+        replica = Database(replica_url)
+        await replica.connect()
+        await replica.migrate(base_model=BaseModel)
+        async with replica.begin_session() as session:
+            await session.execute(
+                insert(User), [{"username": "replicated", "password": "password"}]
+            )
+        await replica.disconnect()
+
+        db = Database(primary_url, read_connection_string=replica_url)
+        await db.connect(pool_size=2, max_overflow=0, read_pool_size=4)
+        try:
+            await db.migrate(base_model=BaseModel)
+            async with db.begin_session() as session:
+                await session.execute(
+                    insert(User), [{"username": "primary", "password": "password"}]
+                )
+
+            async with db.begin_session() as session:
+                written = (await session.scalars(select(User.username))).all()
+            async with db.begin_session(readonly=True) as session:
+                read = (await session.scalars(select(User.username))).all()
+
+            assert written == ["primary"]
+            assert read == ["replicated"]
+            assert db.engine.pool.size() == 1  # type: ignore
+            assert db.read_engine.pool.size() == 4  # type: ignore
+        finally:
+            await db.disconnect()
+
+
+class TestPoolStats:
+    async def test_should_report_the_checkouts_and_the_timeouts(self, tmp_path: Path):
+        db = Database(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+        await db.connect(pool_size=1, max_overflow=0, pool_timeout=0.1)
+        try:
+            async with db.begin_session(readonly=True) as session:
+                await session.execute(text("SELECT 1"))
+
+                with raises(PoolTimeoutError):
+                    async with db.begin_session(readonly=True) as other:
+                        await other.execute(text("SELECT 1"))
+
+                stats = db.pool_stats()
+        finally:
+            await db.disconnect()
+
+        assert stats["read"]["size"] == 1
+        assert stats["read"]["checked_out"] == 1
+        assert stats["read"]["checkouts"] == 1
+        assert stats["read"]["timeouts"] == 1
+        assert stats["read"]["max_wait_seconds"] >= 0.1
+
+
+class TestQueryInstrumentation:
+    async def test_should_count_the_queries_of_the_current_context(
+        self, database: Database
+    ):
+        token = count_queries()
+        async with database.begin_session(readonly=True) as session:
+            for _ in range(3):
+                await session.execute(text("SELECT 1"))
+        counter = stop_counting_queries(token)
+
+        async with database.begin_session(readonly=True) as session:
+            await session.execute(text("SELECT 1"))
+
+        assert counter.count == 3
+        assert counter.seconds > 0
+        assert database.query_stats()["queries"] >= 4
+
+    async def test_should_log_slow_queries_without_their_values(self, tmp_path: Path):
+        messages: list[str] = []
+        sink = logger.add(messages.append, level="WARNING")
+        db = Database(
+            f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", slow_query_threshold=1e-9
+        )
+        await db.connect()
+        try:
+            await db.migrate(base_model=BaseModel)
+            async with db.begin_session() as session:
+                await session.execute(
+                    insert(User), [{"username": "secret", "password": "hunter2"}]
+                )
+        finally:
+            await db.disconnect()
+            logger.remove(sink)
+
+        assert any("INSERT INTO users" in message for message in messages)
+        assert not any("hunter2" in message for message in messages)
+        assert db.query_stats()["slow"] == db.query_stats()["queries"]
+
+    async def test_should_report_nothing_for_an_in_memory_database(self):
+        db = Database("sqlite+aiosqlite:///:memory:")
+        await db.connect()
+        try:
+            stats = db.pool_stats()
+        finally:
+            await db.disconnect()
+
+        assert stats == {"write": {}}
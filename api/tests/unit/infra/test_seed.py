@@ -0,0 +1,67 @@
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import func, select
+
+from src.domain.models import BaseModel, Stock, SymbolRequestCount, User
+from src.infra.db.db import Database
+from src.infra.db.seed import seed, symbol_for
+
+
+class TestSeed:
+    async def test_should_seed_users_and_a_zipfian_history(self, tmp_path: Path):
+        db = Database(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+        await db.connect()
+        batches: list[int] = []
+        try:
+            await db.migrate(base_model=BaseModel)
+            summary = await seed(
+                db,
+                users=20,
+                rows=5000,
+                symbols=50,
+                heavy_share=0.5,
+                batch_size=2000,
+                on_batch=batches.append,
+            )
+
+            async with db.begin_session(readonly=True) as session:
+                users = await session.scalar(select(func.count(User.id)))
+                per_symbol = Counter(
+                    (await session.scalars(select(Stock.symbol))).all()
+                )
+                heavy = await session.scalar(
+                    select(func.count(Stock.id)).where(
+                        Stock.user_id == summary.first_user_id
+                    )
+                )
+                first = (
+                    await session.scalars(select(Stock).order_by(Stock.id).limit(1))
+                ).one()
+                counts = dict(
+                    (
+                        await session.execute(
+                            select(
+                                SymbolRequestCount.symbol,
+                                SymbolRequestCount.times_requested,
+                            )
+                        )
+                    )
+                    .tuples()
+                    .all()
+                )
+        finally:
+            await db.disconnect()
+
+        assert users == 20
+        assert sum(per_symbol.values()) == 5000
+        assert len(per_symbol) <= 50
+        assert batches == [2000, 4000, 5000]
+        # NOTE: The hottest symbol of a Zipf distribution is the most requested one
+        assert per_symbol.most_common(1)[0][0] == symbol_for(0)
+        assert 2000 < (heavy or 0) < 3000
+        assert counts == dict(per_symbol)
+        assert first.created_at.replace(tzinfo=None) == datetime(2020, 1, 1)
+        assert first.stock_datetime == datetime(2020, 1, 1)
+        assert len(first.uuid) == 36
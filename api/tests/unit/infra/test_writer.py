@@ -0,0 +1,120 @@
+import asyncio
+from datetime import datetime
+from typing import cast
+
+from pytest import raises
+
+from src.application.ports import SqlDBPort, StockRecord
+from src.infra.writer import HistoryWriterAdapter
+
+
+class HistoryWriterMock(HistoryWriterAdapter):
+    def __init__(self, **kwargs: int | float):
+        super().__init__(db=cast(SqlDBPort, None), **kwargs)  # type: ignore
+        self.written: list[list[StockRecord]] = []
+        self.release = asyncio.Event()
+        self.release.set()
+        self.failures = 0
+
+    async def _write(self, batch: list[StockRecord]):
+        await self.release.wait()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("The database went away")
+        self.written.append(batch)
+
+
+def make_records(amount: int):
+    return [
+        cast(
+            StockRecord,
+            {
+                "symbol": f"STOCK{idx}.US",
+                "name": f"STOCK{idx}",
+                "stock_datetime": datetime(2025, 1, 28),
+                "open": 1.0,
+                "high": 1.0,
+                "low": 1.0,
+                "close": 1.0,
+                "volume": 1,
+                "user_id": 1,
+            },
+        )
+        for idx in range(amount)
+    ]
+
+
+class TestHistoryWriterAdapter:
+    async def test_should_write_in_batches_and_drain_on_stop(self):
+        writer = HistoryWriterMock(batch_size=3, flush_interval=60)
+        await writer.start()
+
+        await writer.enqueue(make_records(7))
+        await writer.stop()
+
+        assert [len(batch) for batch in writer.written] == [3, 3, 1]
+        assert writer.stats()["flushed"] == 7
+        assert writer.stats()["batches"] == 3
+        assert writer.depth == 0
+        assert not writer.is_running
+
+    async def test_should_flush_after_the_interval(self):
+        writer = HistoryWriterMock(batch_size=100, flush_interval=0.01)
+        await writer.start()
+
+        await writer.enqueue(make_records(2))
+        await asyncio.sleep(0.1)
+
+        assert [len(batch) for batch in writer.written] == [2]
+        await writer.stop()
+
+    async def test_should_apply_backpressure_when_the_queue_is_full(self):
+        writer = HistoryWriterMock(max_size=2, batch_size=1, flush_interval=0)
+        writer.release.clear()
+        await writer.start()
+
+        enqueue = asyncio.create_task(writer.enqueue(make_records(5)))
+        await asyncio.sleep(0.05)
+
+        assert not enqueue.done()
+        assert writer.depth == 2
+        assert writer.blocked >= 1
+
+        writer.release.set()
+        await enqueue
+        await writer.stop()
+
+        assert writer.stats()["flushed"] == 5
+
+    async def test_should_raise_when_enqueuing_while_not_running(self):
+        writer = HistoryWriterMock()
+
+        with raises(RuntimeError):
+            await writer.enqueue(make_records(1))
+
+    async def test_should_retry_a_batch_that_failed_to_be_written(self):
+        writer = HistoryWriterMock(batch_size=10, flush_interval=0, retry_backoff=0)
+        writer.failures = 1
+        await writer.start()
+
+        await writer.enqueue(make_records(3))
+        await writer.stop()
+
+        assert [len(batch) for batch in writer.written] == [3]
+        assert writer.stats()["retries"] == 1
+        assert writer.stats()["flushed"] == 3
+        assert writer.stats()["failed"] == 0
+
+    async def test_should_drop_a_batch_after_the_last_retry(self):
+        writer = HistoryWriterMock(
+            batch_size=10, flush_interval=0, max_retries=2, retry_backoff=0
+        )
+        writer.failures = 3
+        await writer.start()
+
+        await writer.enqueue(make_records(3))
+        await writer.stop()
+
+        assert writer.written == []
+        assert writer.stats()["retries"] == 2
+        assert writer.stats()["failed"] == 3
@@ -0,0 +1,39 @@
+from typing import cast
+
+from pytest import fixture
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.types import ASGIApp
+from src.application.services import AuthService
+from src.domain.models import BaseModel, User
+from src.infra.repository.users import UsersRepo
+from src.interface.api.http.flask.asgi import ASGIFactory
+
+
+@fixture
+async def app():
+    app = cast(ASGIApp, ASGIFactory.new())
+    async with app.test_app():
+        await app.state.db.migrate(base_model=BaseModel)
+        yield app
+
+
+@fixture
+async def user(app: ASGIApp):
+    async with app.state.db.begin_session() as ses:  # type: ignore
+        session = cast(AsyncSession, ses)
+        user = await AuthService(repo=UsersRepo(session=session)).create(
+            username="user", password="password"
+        )
+        await session.commit()
+
+    return user
+
+
+@fixture
+async def headers(app: ASGIApp, user: User):
+    async with app.state.db.begin_session(readonly=True) as session:  # type: ignore
+        svc = AuthService(repo=UsersRepo(session=cast(AsyncSession, session)))
+        token = await svc.login(username=user.username, password="password")
+
+    return {"Authorization": f"Bearer {token}"}
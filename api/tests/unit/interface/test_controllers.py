@@ -0,0 +1,146 @@
+import json
+from datetime import datetime
+from typing import cast
+
+from pytest import MonkeyPatch, mark
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conf import settings
+from shared.types import ASGIApp
+from src.application.ports import StockRecord
+from src.domain.models import User
+from src.infra.repository.stocks import StocksRepo
+from src.interface.api.http.flask.asgi import ASGIFactory
+
+
+async def add_history(app: ASGIApp, user: User, amount: int):
+    records = [
+        cast(
+            StockRecord,
+            {
+                "symbol": f"STOCK{idx}.US",
+                "name": f"STOCK{idx}",
+                "stock_datetime": datetime(2025, 1, 28),
+                "open": 1.0,
+                "high": 1.0,
+                "low": 1.0,
+                "close": 1.0,
+                "volume": 1,
+                "user_id": user.id,
+            },
+        )
+        for idx in range(amount)
+    ]
+    async with app.state.db.begin_session() as ses:  # type: ignore
+        session = cast(AsyncSession, ses)
+        await StocksRepo(session=session).bulk_create(records)
+        await session.commit()
+
+
+class TestHistoryStream:
+    async def test_should_stream_an_empty_history(
+        self, app: ASGIApp, headers: dict[str, str]
+    ):
+        client = app.test_client()
+
+        as_json = await client.get("/api/v1/history?stream=json", headers=headers)
+        as_ndjson = await client.get("/api/v1/history?stream=ndjson", headers=headers)
+
+        assert as_json.status_code == as_ndjson.status_code == 200
+        assert as_json.content_type == "application/json"
+        assert as_ndjson.content_type == "application/x-ndjson"
+        assert await as_json.get_data(as_text=True) == "[]"
+        assert await as_ndjson.get_data(as_text=True) == ""
+
+    @mark.parametrize(argnames="chunk_size", argvalues=[1, 2, 5, 6])
+    async def test_should_frame_every_chunk(
+        self,
+        app: ASGIApp,
+        user: User,
+        headers: dict[str, str],
+        monkeypatch: MonkeyPatch,
+        chunk_size: int,
+    ):
+        await add_history(app, user, amount=5)
+        monkeypatch.setattr(settings, "HISTORY_STREAM_CHUNK_SIZE", chunk_size)
+        client = app.test_client()
+
+        page = await client.get("/api/v1/history?limit=10", headers=headers)
+        as_json = await client.get("/api/v1/history?stream=json", headers=headers)
+        as_ndjson = await client.get("/api/v1/history?stream=ndjson", headers=headers)
+        lines = (await as_ndjson.get_data(as_text=True)).splitlines()
+
+        expected = await page.get_json()
+        assert len(expected) == 5
+        assert json.loads(await as_json.get_data(as_text=True)) == expected
+        assert [json.loads(line) for line in lines] == expected
+
+    async def test_should_reject_an_unknown_format(
+        self, app: ASGIApp, headers: dict[str, str]
+    ):
+        response = await app.test_client().get(
+            "/api/v1/history?stream=csv", headers=headers
+        )
+
+        assert response.status_code == 400
+
+
+class TestHistoryPage:
+    @mark.parametrize(argnames="limit", argvalues=["abc", "1.5", ""])
+    async def test_should_reject_a_limit_that_is_not_an_integer(
+        self, app: ASGIApp, headers: dict[str, str], limit: str
+    ):
+        response = await app.test_client().get(
+            f"/api/v1/history?limit={limit}", headers=headers
+        )
+
+        assert response.status_code == 400
+        assert await response.get_json() == {
+            "detail": "The 'limit' query param must be an integer"
+        }
+
+
+class TestStats:
+    @mark.parametrize(argnames="up_to", argvalues=["abc", "1.5", ""])
+    async def test_should_reject_an_up_to_that_is_not_an_integer(
+        self, app: ASGIApp, headers: dict[str, str], up_to: str
+    ):
+        response = await app.test_client().get(
+            f"/api/v1/stats?up_to={up_to}", headers=headers
+        )
+
+        assert response.status_code == 400
+        assert await response.get_json() == {
+            "detail": "The 'up_to' query param must be an integer"
+        }
+
+
+class TestQueryCount:
+    async def test_should_count_the_queries_of_each_request(
+        self, app: ASGIApp, user: User, headers: dict[str, str]
+    ):
+        await add_history(app, user, amount=1)
+        client = app.test_client()
+
+        # NOTE: The first request misses the users cache, so it also looks the user up
+        miss = await client.get("/api/v1/history", headers=headers)
+        hit = await client.get("/api/v1/history", headers=headers)
+
+        assert miss.status_code == hit.status_code == 200
+        assert miss.headers["X-Query-Count"] == "2"
+        assert hit.headers["X-Query-Count"] == "1"
+        assert hit.headers["X-Query-Time"].endswith("ms")
+        assert float(hit.headers["X-Query-Time"].removesuffix("ms")) >= 0
+
+    async def test_should_not_expose_the_query_count_in_production(
+        self, monkeypatch: MonkeyPatch
+    ):
+        monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+        app = cast(ASGIApp, ASGIFactory.new())
+
+        async with app.test_app():
+            response = await app.test_client().get("/api/v1/history")
+
+        assert response.status_code == 401
+        assert "X-Query-Count" not in response.headers
+        assert "X-Query-Time" not in response.headers
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+from pytest import mark
+
+from conf import settings
+
+# NOTE: Cumulative import times, in seconds, about 2.5 times what was measured when
+# they were set, so that only regressions and not a slow machine make them fail
+BUDGETS = {"conf": 0.5, "src.interface.cli": 6.0}
+
+# NOTE: Only some commands or deployments need these
+LAZY_MODULES = {
+    "benchmarks",
+    "uvicorn",
+    "quart",
+    "httpx",
+    "sqlalchemy.dialects.postgresql",
+}
+
+
+def _import_times(module: str):
+    """Cumulative import time in seconds of every module imported by `module`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        cwd=settings.BASE_DIR,
+        env=os.environ.copy(),
+        text=True,
+    )
+
+    times: dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative) / 1_000_000
+    return times
+
+
+class TestImportTime:
+    @mark.parametrize(argnames="module", argvalues=list(BUDGETS))
+    def test_should_import_within_budget(self, module: str):
+        times = _import_times(module)
+
+        assert times[module] < BUDGETS[module]
+        assert not LAZY_MODULES & set(times)
+
+    def test_settings_should_not_import_the_app(self):
+        times = _import_times("conf")
+
+        assert not {"sqlalchemy", "jwt", "bcrypt"} & set(times)
@@ -0,0 +1,49 @@
+from pytest import MonkeyPatch
+
+from conf import settings
+from shared.types import ASGIApp
+
+LATENCY = "stock_api_request_duration_seconds"
+
+
+class TestMetrics:
+    async def test_should_time_the_requests_by_route(self, app: ASGIApp):
+        client = app.test_client()
+        for _ in range(2):
+            await client.get("/api/v1/history")
+        await client.get("/api/v1/nowhere")
+
+        response = await client.get("/metrics")
+        body = await response.get_data(as_text=True)
+
+        assert response.status_code == 200
+        assert response.content_type.startswith("text/plain; version=0.0.4")
+        assert (
+            f'{LATENCY}_count{{route="/api/v1/history",method="GET",status="401"}} 2'
+            in body
+        )
+        assert (
+            f'{LATENCY}_count{{route="<unmatched>",method="GET",status="404"}} 1'
+            in (body)
+        )
+        assert 'stock_api_cache_hits_total{cache="users"} 0' in body
+        assert "stock_api_db_pool" not in body
+        assert "stock_api_stock_requests" not in body
+
+    async def test_should_require_the_token_once_set(
+        self, app: ASGIApp, monkeypatch: MonkeyPatch
+    ):
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "secret")
+        client = app.test_client()
+
+        denied = await client.get("/metrics")
+        wrong = await client.get("/metrics", headers={"Authorization": "Bearer nope"})
+        allowed = await client.get(
+            "/metrics", headers={"Authorization": "Bearer secret"}
+        )
+        body = await allowed.get_data(as_text=True)
+
+        assert denied.status_code == wrong.status_code == 401
+        assert allowed.status_code == 200
+        assert "# TYPE stock_api_db_pool_checked_out gauge" in body
+        assert "# TYPE stock_api_stock_requests gauge" in body
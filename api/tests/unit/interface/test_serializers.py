@@ -0,0 +1,43 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+from quart import Quart
+from quart.json.provider import DefaultJSONProvider
+
+from src.interface.api.http.flask.serializers import ORJSONProvider
+
+
+@dataclass
+class Entry:
+    id: int
+    name: str
+
+
+class TestORJSONProvider:
+    def test_dumps_should_match_the_default_provider(self):
+        app = Quart(__name__)
+        data = {"b": [1, 2.5, None, True], "a": "ação", "c": Entry(id=1, name="x")}
+
+        orjson_data = ORJSONProvider(app).dumps(data)
+
+        assert json.loads(orjson_data) == json.loads(
+            DefaultJSONProvider(app).dumps(data)
+        )
+        assert list(json.loads(orjson_data)) == ["b", "a", "c"]
+
+    def test_dumps_should_encode_datetimes_and_decimals(self):
+        data = {"date": datetime(2025, 1, 28, 19, 3, 58), "quote": Decimal("239.12")}
+
+        assert ORJSONProvider(Quart(__name__)).dumps(data) == (
+            '{"date":"2025-01-28T19:03:58","quote":"239.12"}'
+        )
+
+    async def test_response(self):
+        app = Quart(__name__)
+        response = ORJSONProvider(app).response([{"symbol": "AAPL.US"}])
+
+        assert response.mimetype == "application/json"
+        assert await response.get_data() == b'[{"symbol":"AAPL.US"}]\n'
+        assert ORJSONProvider(app).loads(b'{"a": 1}') == {"a": 1}
@@ -0,0 +1,50 @@
+from time import sleep
+
+from shared.cache import TTLCache
+
+
+class TestTTLCache:
+    def test_get_and_set(self):
+        cache = TTLCache[str, int](max_size=2, ttl=60)
+
+        assert cache.get("a") is None
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.hits == 1
+        assert cache.misses == 1
+        assert cache.hit_rate == 0.5
+
+    def test_should_evict_the_least_recently_used_entry(self):
+        cache = TTLCache[str, int](max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_should_expire_entries(self):
+        cache = TTLCache[str, int](max_size=2, ttl=60)
+        cache.set("a", 1, ttl=0.01)
+        cache.set("b", 2, ttl=0)
+        sleep(0.02)
+
+        assert cache.get("a") is None
+        assert cache.get("b") is None
+        assert not len(cache)
+
+    def test_invalidate(self):
+        cache = TTLCache[str, int](max_size=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.invalidate("a")
+
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+        cache.clear()
+        assert not len(cache)
@@ -0,0 +1,59 @@
+from shared.heavy_hitters import HeavyHitters, RotatingTopK, SpaceSaving
+
+
+class TestSpaceSaving:
+    def test_top(self):
+        sketch = SpaceSaving[str](capacity=3)
+        for key, count in (("a", 5), ("b", 3), ("c", 1)):
+            sketch.add(key, count)
+
+        assert sketch.top(2) == [("a", 5), ("b", 3)]
+
+    def test_should_replace_the_smallest_counter_when_full(self):
+        sketch = SpaceSaving[str](capacity=2)
+        sketch.add("a", 5)
+        sketch.add("b", 2)
+        sketch.add("c")
+
+        assert len(sketch) == 2
+        assert sketch.top(2) == [("a", 5), ("c", 3)]
+
+    def test_reset(self):
+        sketch = SpaceSaving[str](capacity=2)
+        sketch.add("a")
+        sketch.reset({"a": 1, "b": 10, "c": 5})
+
+        assert sketch.top(3) == [("b", 10), ("c", 5)]
+
+
+class TestRotatingTopK:
+    def test_should_only_count_the_last_buckets(self):
+        window = RotatingTopK[str](capacity=10, bucket_seconds=60, buckets=2)
+        window.add("a", 3, now=0)
+        window.add("b", 2, now=60)
+        window.add("a", 1, now=90)
+
+        assert window.top(2, now=90) == [("a", 4), ("b", 2)]
+        assert window.top(2, now=120) == [("b", 2), ("a", 1)]
+        assert window.top(2, now=240) == []
+
+
+class TestHeavyHitters:
+    def test_add_many_and_top(self):
+        tracker = HeavyHitters[str](capacity=10)
+        tracker.add_many(["a", "b", "a"])
+
+        assert tracker.top(1) == [("a", 2)]
+        assert tracker.top(2, window="hour") == [("a", 2), ("b", 1)]
+        assert tracker.top(2, window="day") == [("a", 2), ("b", 1)]
+
+    def test_reconcile(self):
+        tracker = HeavyHitters[str](capacity=10)
+        tracker.add("a")
+
+        assert tracker.should_reconcile(interval=60)
+        tracker.reconcile({"a": 10, "b": 20})
+
+        assert not tracker.should_reconcile(interval=60)
+        assert tracker.top(2) == [("b", 20), ("a", 10)]
+        assert tracker.top(2, window="hour") == [("a", 1)]
@@ -0,0 +1,70 @@
+import anyio
+
+from shared.metrics import (
+    Histogram,
+    RequestMetrics,
+    phase,
+    render_histograms,
+    render_samples,
+    timed,
+)
+
+
+class TestHistogram:
+    def test_should_count_the_values_up_to_each_bound(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 5.0):
+            histogram.observe(value)
+
+        assert list(histogram.cumulative()) == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+        assert histogram.count == 4
+        assert histogram.sum == 5.65
+
+
+class TestRequestMetrics:
+    async def test_should_record_the_phases_of_the_current_request(self):
+        metrics = RequestMetrics(buckets=(1.0,))
+
+        @timed("proxy")
+        async def fetch():
+            await anyio.sleep(0)
+
+        token = metrics.begin()
+        with phase("jwt"):
+            pass
+        await fetch()
+        await fetch()
+        metrics.end(token, route="/stock", method="GET", status=200, elapsed=0.5)
+
+        assert metrics.latency[("/stock", "GET", 200)].count == 1
+        assert {name for _, name in metrics.phases} == {"jwt", "proxy"}
+        # NOTE: Repeated phases add up to a single observation per request
+        assert metrics.phases[("/stock", "proxy")].count == 1
+
+    async def test_should_not_record_phases_outside_of_requests(self):
+        metrics = RequestMetrics()
+
+        with phase("jwt"):
+            pass
+        metrics.end(metrics.begin(), route="/", method="GET", status=404, elapsed=0)
+
+        assert metrics.phases == {}
+
+    def test_should_render_the_prometheus_text_format(self):
+        histogram = Histogram(buckets=(1.0,))
+        histogram.observe(0.25)
+
+        assert render_histograms("t", "Test", [({"route": '/a"b'}, histogram)]) == [
+            "# HELP t Test",
+            "# TYPE t histogram",
+            't_bucket{route="/a\\"b",le="1.0"} 1',
+            't_bucket{route="/a\\"b",le="+Inf"} 1',
+            't_sum{route="/a\\"b"} 0.25',
+            't_count{route="/a\\"b"} 1',
+        ]
+        assert render_samples("g", "gauge", "Test", [({}, 3), ({"a": "b"}, 0.5)]) == [
+            "# HELP g Test",
+            "# TYPE g gauge",
+            "g 3",
+            'g{a="b"} 0.5',
+        ]
@@ -0,0 +1,33 @@
+from decimal import Decimal
+from random import Random
+
+from pytest import mark
+
+from shared.utils import to_fixed, to_fixed_many
+
+edge_cases = [0.0, -0.0, 0.005, 0.015, 0.125, 1.005, 2.675, -2.675, 239.12, 1e10, -1e-7]
+
+
+class TestToFixedMany:
+    @mark.parametrize(argnames="places", argvalues=[0, 1, 2, 3, 5])
+    def test_should_match_to_fixed_for_floats(self, places: int):
+        rnd = Random(places)
+        values = [*edge_cases, *(rnd.uniform(-1000, 1000) for _ in range(10_000))]
+
+        assert to_fixed_many(values, places) == [to_fixed(v, places) for v in values]
+
+    @mark.parametrize(argnames="places", argvalues=[0, 1, 2, 3, 5])
+    def test_should_match_to_fixed_for_decimals(self, places: int):
+        rnd = Random(places)
+        values = [
+            *(Decimal(f"{value:.5f}") for value in edge_cases),
+            *(Decimal(f"{rnd.uniform(-1000, 1000):.5f}") for _ in range(10_000)),
+        ]
+
+        assert to_fixed_many(values, places) == [to_fixed(v, places) for v in values]
+
+    def test_should_match_to_fixed_for_mixed_values(self):
+        values = [Decimal("2.67500"), 2.675, Decimal("0.12500"), 1.005]
+
+        assert to_fixed_many(values) == [to_fixed(v) for v in values]
+        assert to_fixed_many([]) == []
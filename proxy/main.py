@@ -1,11 +1,47 @@
+import asyncio
+import os
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from functools import wraps
-from typing import Awaitable, Callable, Literal
+from importlib.util import find_spec
+from time import monotonic
+from typing import Any, AsyncIterator, Awaitable, Callable, Coroutine, Literal, cast
 from urllib.parse import urlencode
 
 from anyio import sleep
-from fastapi import FastAPI, HTTPException
-from httpx import AsyncClient, Response
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request
+from httpx import AsyncClient, Limits, Response, Timeout
+from pydantic import BaseModel, ValidationError
+
+
+class Settings:
+    STOOQ_URL = os.environ.get("PROXY_STOOQ_URL", "https://stooq.com")
+
+    # NOTE: HTTP/2 multiplexes every request to stooq over a handful of sockets, but
+    # it needs the optional 'h2' package. Without it we fall back to HTTP/1.1
+    HTTP2 = os.environ.get("PROXY_HTTP2", "true").lower() == "true" and bool(
+        find_spec("h2")
+    )
+
+    MAX_CONNECTIONS = int(os.environ.get("PROXY_MAX_CONNECTIONS", "20"))
+    MAX_KEEPALIVE_CONNECTIONS = int(
+        os.environ.get("PROXY_MAX_KEEPALIVE_CONNECTIONS", "20")
+    )
+    KEEPALIVE_EXPIRY = float(os.environ.get("PROXY_KEEPALIVE_EXPIRY", "30"))
+    POOL_TIMEOUT = float(os.environ.get("PROXY_POOL_TIMEOUT", "5"))
+    CONNECT_TIMEOUT = float(os.environ.get("PROXY_CONNECT_TIMEOUT", "5"))
+    REQUEST_TIMEOUT = float(os.environ.get("PROXY_REQUEST_TIMEOUT", "10"))
+
+    CACHE_TTL = float(os.environ.get("PROXY_CACHE_TTL", "5"))
+    CACHE_STALE_TTL = float(os.environ.get("PROXY_CACHE_STALE_TTL", "30"))
+    CACHE_MAX_SIZE = int(os.environ.get("PROXY_CACHE_MAX_SIZE", "1024"))
+
+    BATCH_MAX_SYMBOLS = int(os.environ.get("PROXY_BATCH_MAX_SYMBOLS", "200"))
+    BATCH_CHUNK_SIZE = int(os.environ.get("PROXY_BATCH_CHUNK_SIZE", "20"))
+
+
+settings = Settings()
 
 
 class ResponseSchema(BaseModel):
@@ -20,6 +56,21 @@ class ResponseSchema(BaseModel):
     name: str
 
 
+class BatchResponseSchema(BaseModel):
+    results: dict[str, ResponseSchema]
+    errors: dict[str, str]
+
+
+class CacheStatsSchema(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    stale_hits: int
+    misses: int
+    coalesced: int
+    evictions: int
+
+
 class FetchException(Exception):
     def __init__(self, message: str):
         self.message = message
@@ -60,14 +111,20 @@ def retry(times: int, delay: int):
 
 @retry(times=2, delay=1)
 async def fetch(
-    method: Literal["GET"], url: str, expected_status_codes: tuple[int, ...]
+    client: AsyncClient,
+    method: Literal["GET"],
+    url: str,
+    expected_status_codes: tuple[int, ...],
+    timeout: float = settings.REQUEST_TIMEOUT,
 ):
-    async with AsyncClient() as client:
-        func: Callable[[str], Awaitable[Response]] = getattr(
-            client, method.lower().strip()
-        )
+    func: Callable[..., Awaitable[Response]] = getattr(client, method.lower().strip())
 
-        response = await func(url)
+    response = await func(
+        url,
+        timeout=Timeout(
+            timeout, connect=settings.CONNECT_TIMEOUT, pool=settings.POOL_TIMEOUT
+        ),
+    )
 
     if response.status_code in expected_status_codes:
         return response
@@ -77,19 +134,248 @@ async def fetch(
     )
 
 
-app = FastAPI()
+type Quote = dict[str, Any]
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    value: Quote
+    fresh_until: float
+    stale_until: float
+
+
+class QuoteCache:
+    """
+    In-memory LRU cache for quotes, keyed on the normalized symbol.
+
+    Entries are served as-is for `ttl` seconds. For `stale_ttl` more seconds they
+    are still served, while a single background refresh is triggered. Concurrent
+    misses for the same symbol are coalesced into one upstream call.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float, max_size: int):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task[Quote]] = {}
+
+        self.hits = self.stale_hits = self.misses = 0
+        self.coalesced = self.evictions = 0
+
+    @staticmethod
+    def normalize(symbol: str):
+        return symbol.strip().upper()
+
+    async def get(self, symbol: str, loader: Callable[[str], Awaitable[Quote]]):
+        key, now = self.normalize(symbol), monotonic()
+
+        if (entry := self._entries.get(key)) is not None:
+            if now < entry.fresh_until:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+
+            if now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self._load(key, loader).add_done_callback(self._discard_error)
+                return entry.value
+
+        if (task := self._inflight.get(key)) is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = self._load(key, loader)
+
+        # NOTE: Shielded so that a client that disconnects does not cancel the fetch
+        # for every other request that is waiting on it
+        return await asyncio.shield(task)
+
+    async def get_many(
+        self,
+        symbols: list[str],
+        loader: Callable[[list[str]], Coroutine[Any, Any, dict[str, Quote]]],
+        chunk_size: int,
+    ):
+        """
+        Same as `get`, but every symbol that is neither cached nor in-flight is
+        fetched through `loader` in chunks of up to `chunk_size` symbols. Returns
+        the quotes and the errors, both keyed on the normalized symbol.
+
+        Cached entries are served without any further check, so `loader` must leave
+        out every symbol it has no valid quote for. Those end up in the errors as a
+        `KeyError` and are never cached.
+        """
+        results: dict[str, Quote] = {}
+        pending: dict[str, asyncio.Task[Quote]] = {}
+        missing: list[str] = []
+        stale: list[str] = []
+        now = monotonic()
+
+        for key in dict.fromkeys(map(self.normalize, symbols)):
+            entry = self._entries.get(key)
+            if entry is not None and now < entry.stale_until:
+                self._entries.move_to_end(key)
+                results[key] = entry.value
+                if now < entry.fresh_until:
+                    self.hits += 1
+                else:
+                    self.stale_hits += 1
+                    if key not in self._inflight:
+                        stale.append(key)
+            elif (task := self._inflight.get(key)) is not None:
+                self.coalesced += 1
+                pending[key] = task
+            else:
+                self.misses += 1
+                missing.append(key)
+
+        pending.update(self._load_many(missing, loader, chunk_size))
+        for task in self._load_many(stale, loader, chunk_size).values():
+            task.add_done_callback(self._discard_error)
+
+        errors: dict[str, BaseException] = {}
+        outcomes = await asyncio.gather(
+            *(asyncio.shield(task) for task in pending.values()),
+            return_exceptions=True,
+        )
+        for key, outcome in zip(pending, outcomes):
+            if isinstance(outcome, BaseException):
+                errors[key] = outcome
+            else:
+                results[key] = outcome
+
+        return results, errors
+
+    def set(self, symbol: str, value: Quote):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+
+        key, now = self.normalize(symbol), monotonic()
+        self._entries[key] = CacheEntry(
+            value=value,
+            fresh_until=now + self.ttl,
+            stale_until=now + self.ttl + self.stale_ttl,
+        )
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        return CacheStatsSchema(
+            size=len(self._entries),
+            max_size=self.max_size,
+            hits=self.hits,
+            stale_hits=self.stale_hits,
+            misses=self.misses,
+            coalesced=self.coalesced,
+            evictions=self.evictions,
+        )
+
+    def _load(self, key: str, loader: Callable[[str], Awaitable[Quote]]):
+        async def load():
+            value = await loader(key)
+            self.set(key, value)
+            return value
+
+        return self._track(key, load())
+
+    def _load_many(
+        self,
+        keys: list[str],
+        loader: Callable[[list[str]], Coroutine[Any, Any, dict[str, Quote]]],
+        chunk_size: int,
+    ):
+        async def pick(batch: "asyncio.Task[dict[str, Quote]]", key: str):
+            if (value := (await batch).get(key)) is None:
+                raise KeyError(key)
+            self.set(key, value)
+            return value
+
+        tasks: dict[str, asyncio.Task[Quote]] = {}
+        for idx in range(0, len(keys), max(chunk_size, 1)):
+            chunk = keys[idx : idx + max(chunk_size, 1)]
+            batch = asyncio.create_task(loader(chunk))
+            for key in chunk:
+                tasks[key] = self._track(key, pick(batch, key))
+
+        return tasks
+
+    def _track(self, key: str, coro: Coroutine[Any, Any, Quote]):
+        task = asyncio.create_task(coro)
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    @staticmethod
+    def _discard_error(task: "asyncio.Task[Quote]"):
+        if not task.cancelled():
+            task.exception()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # NOTE: A single client per worker keeps a bounded pool of keep-alive sockets
+    # to stooq instead of paying the connection (and TLS) setup on every request
+    async with AsyncClient(
+        base_url=settings.STOOQ_URL,
+        http2=settings.HTTP2,
+        limits=Limits(
+            max_connections=settings.MAX_CONNECTIONS,
+            max_keepalive_connections=settings.MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.KEEPALIVE_EXPIRY,
+        ),
+        timeout=Timeout(
+            settings.REQUEST_TIMEOUT,
+            connect=settings.CONNECT_TIMEOUT,
+            pool=settings.POOL_TIMEOUT,
+        ),
+    ) as client:
+        app.state.client = client
+        app.state.cache = QuoteCache(
+            ttl=settings.CACHE_TTL,
+            stale_ttl=settings.CACHE_STALE_TTL,
+            max_size=settings.CACHE_MAX_SIZE,
+        )
+        yield
+
+
+def get_client(request: Request):
+    return cast(AsyncClient, request.app.state.client)
+
+
+def get_cache(request: Request):
+    return cast(QuoteCache, request.app.state.cache)
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.get("/details/{stock}", response_model=ResponseSchema)
-async def get_stock_details(stock: str):
-    try:
-        qs = {"s": stock, "f": "sd2t2ohlcvn", "e": "json"}
+async def get_stock_details(stock: str, request: Request):
+    client = get_client(request)
+
+    async def load(symbol: str) -> Quote:
+        qs = {"s": symbol, "f": "sd2t2ohlcvn", "e": "json"}
         response = await fetch(
+            client=client,
             method="GET",
-            url=f"https://stooq.com/q/l/?{urlencode(qs)}",
+            url=f"/q/l/?{urlencode(qs)}",
             expected_status_codes=(200,),
         )
-        return response.json()["symbols"][0]
+        quote = response.json()["symbols"][0]
+        # NOTE: Unknown symbols come back filled with 'N/D' values. Validating here
+        # raises before the quote reaches the cache
+        ResponseSchema.model_validate(quote)
+        return quote
+
+    try:
+        return await get_cache(request).get(stock, loader=load)
     except Exception as exc:
         raise HTTPException(
             status_code=500,
@@ -98,3 +384,59 @@ async def get_stock_details(stock: str):
                 "Check the logs"
             ),
         ) from exc
+
+
+@app.get("/details", response_model=BatchResponseSchema)
+async def get_stocks_details(s: str, request: Request):
+    if not (symbols := [symbol for symbol in s.split(",") if symbol.strip()]):
+        raise HTTPException(status_code=400, detail="No symbols were informed")
+
+    if len(symbols) > settings.BATCH_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_MAX_SYMBOLS} symbols can be requested",
+        )
+
+    client = get_client(request)
+
+    async def load(symbols: list[str]) -> dict[str, Quote]:
+        # NOTE: Stooq accepts several symbols at once, separated by '+'
+        qs = {"s": " ".join(symbols), "f": "sd2t2ohlcvn", "e": "json"}
+        response = await fetch(
+            client=client,
+            method="GET",
+            url=f"/q/l/?{urlencode(qs)}",
+            expected_status_codes=(200,),
+        )
+
+        quotes: dict[str, Quote] = {}
+        for entry in response.json()["symbols"]:
+            # NOTE: Unknown symbols come back filled with 'N/D' values
+            try:
+                ResponseSchema.model_validate(entry)
+            except ValidationError:
+                continue
+            quotes[QuoteCache.normalize(entry["symbol"])] = entry
+
+        return quotes
+
+    results, errors = await get_cache(request).get_many(
+        symbols, loader=load, chunk_size=settings.BATCH_CHUNK_SIZE
+    )
+
+    return {
+        "results": results,
+        "errors": {
+            symbol: (
+                "No data was found for this symbol"
+                if isinstance(exc, KeyError)
+                else "Could not complete the request to the third-party service"
+            )
+            for symbol, exc in errors.items()
+        },
+    }
+
+
+@app.get("/cache/stats", response_model=CacheStatsSchema)
+async def get_cache_stats(request: Request):
+    return get_cache(request).stats()
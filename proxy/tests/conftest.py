@@ -0,0 +1,104 @@
+import asyncio
+from typing import Any
+
+from httpx import ASGITransport, AsyncClient, MockTransport, Request, Response
+from pytest import MonkeyPatch, fixture
+
+import main
+from main import QuoteCache, app, settings
+
+
+def quote(symbol: str, close: float = 1.0) -> dict[str, Any]:
+    return {
+        "symbol": symbol,
+        "date": "2025-01-28",
+        "time": "22:00:00",
+        "open": 1.0,
+        "high": 1.0,
+        "low": 1.0,
+        "close": close,
+        "volume": 1,
+        "name": symbol.split(".")[0],
+    }
+
+
+def not_found(symbol: str) -> dict[str, Any]:
+    return {
+        "symbol": symbol,
+        **dict.fromkeys(
+            ("date", "time", "open", "high", "low", "close", "volume", "name"), "N/D"
+        ),
+    }
+
+
+class Stooq:
+    """
+    Fake stooq quotes endpoint. Records every request, answers known symbols with
+    `quotes` and unknown ones with 'N/D' values, and holds the responses while
+    `gate` is cleared.
+    """
+
+    def __init__(self):
+        self.requests: list[Request] = []
+        self.quotes: dict[str, dict[str, Any]] = {}
+        self.status_code = 200
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    @property
+    def symbols(self):
+        return [request.url.params["s"].split(" ") for request in self.requests]
+
+    async def __call__(self, request: Request):
+        self.requests.append(request)
+        await self.gate.wait()
+
+        if self.status_code != 200:
+            return Response(self.status_code)
+
+        return Response(
+            200,
+            json={
+                "symbols": [
+                    self.quotes.get(symbol, not_found(symbol))
+                    for symbol in request.url.params["s"].split(" ")
+                ]
+            },
+        )
+
+
+async def settle():
+    """Waits for every background task, such as the stale refreshes"""
+    while tasks := asyncio.all_tasks() - {asyncio.current_task()}:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@fixture(autouse=True)
+def no_backoff(monkeypatch: MonkeyPatch):
+    async def sleep(delay: float):
+        pass
+
+    monkeypatch.setattr(main, "sleep", sleep)
+
+
+@fixture
+def stooq():
+    return Stooq()
+
+
+@fixture
+def cache():
+    return QuoteCache(ttl=5, stale_ttl=30, max_size=1024)
+
+
+@fixture
+async def client(stooq: Stooq, cache: QuoteCache):
+    async with AsyncClient(
+        base_url=settings.STOOQ_URL, transport=MockTransport(stooq)
+    ) as upstream:
+        app.state.client = upstream
+        app.state.cache = cache
+        async with AsyncClient(
+            base_url="http://proxy", transport=ASGITransport(app=app)
+        ) as client:
+            yield client
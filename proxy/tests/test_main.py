@@ -0,0 +1,204 @@
+import asyncio
+
+from httpx import AsyncClient
+from pytest import MonkeyPatch, fixture, mark
+
+import main
+from main import QuoteCache, settings
+
+from .conftest import Stooq, quote, settle
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@fixture
+def clock(monkeypatch: MonkeyPatch):
+    clock = Clock()
+    monkeypatch.setattr(main, "monotonic", clock)
+    return clock
+
+
+class TestStockDetails:
+    async def test_should_coalesce_concurrent_misses(
+        self, client: AsyncClient, stooq: Stooq, cache: QuoteCache
+    ):
+        stooq.quotes["AAPL.US"] = quote("AAPL.US")
+        stooq.gate.clear()
+
+        requests = [
+            asyncio.create_task(client.get("/details/aapl.us")) for _ in range(5)
+        ]
+        while cache.misses + cache.coalesced < len(requests):
+            await asyncio.sleep(0)
+        stooq.gate.set()
+        responses = await asyncio.gather(*requests)
+
+        assert [response.status_code for response in responses] == [200] * 5
+        assert len(stooq.requests) == 1
+        assert (cache.misses, cache.coalesced, cache.hits) == (1, 4, 0)
+
+    async def test_should_refresh_a_stale_entry_once(
+        self, client: AsyncClient, stooq: Stooq, cache: QuoteCache, clock: Clock
+    ):
+        stooq.quotes["AAPL.US"] = quote("AAPL.US", close=1.0)
+        await client.get("/details/aapl.us")
+
+        clock.now += cache.ttl + 1
+        stooq.quotes["AAPL.US"] = quote("AAPL.US", close=2.0)
+        stooq.gate.clear()
+        stale = [await client.get("/details/aapl.us") for _ in range(3)]
+        stooq.gate.set()
+        await settle()
+        fresh = await client.get("/details/aapl.us")
+
+        assert [response.json()["close"] for response in stale] == [1.0] * 3
+        assert fresh.json()["close"] == 2.0
+        assert len(stooq.requests) == 2
+        assert (cache.misses, cache.stale_hits, cache.hits) == (1, 3, 1)
+
+    async def test_should_not_cache_a_failed_fetch(
+        self, client: AsyncClient, stooq: Stooq, cache: QuoteCache
+    ):
+        stooq.quotes["AAPL.US"] = quote("AAPL.US")
+
+        stooq.status_code = 503
+        failed = await client.get("/details/aapl.us")
+        stooq.status_code = 200
+        succeeded = await client.get("/details/aapl.us")
+
+        assert failed.status_code == 500
+        assert succeeded.status_code == 200
+        assert len(stooq.requests) == 3
+        assert (cache.stats().size, cache.misses, cache.hits) == (1, 2, 0)
+
+    async def test_should_not_cache_an_unknown_symbol(
+        self, client: AsyncClient, stooq: Stooq, cache: QuoteCache
+    ):
+        responses = [await client.get("/details/bad.us") for _ in range(2)]
+
+        assert [response.status_code for response in responses] == [500] * 2
+        assert len(stooq.requests) == 2
+        assert cache.stats().size == 0
+
+    async def test_should_expose_the_counters(self, client: AsyncClient, stooq: Stooq):
+        stooq.quotes["AAPL.US"] = quote("AAPL.US")
+        for _ in range(2):
+            await client.get("/details/aapl.us")
+
+        response = await client.get("/cache/stats")
+
+        assert response.json() == {
+            "size": 1,
+            "max_size": 1024,
+            "hits": 1,
+            "stale_hits": 0,
+            "misses": 1,
+            "coalesced": 0,
+            "evictions": 0,
+        }
+
+
+class TestQuoteCache:
+    async def test_should_evict_the_least_recently_used_entry(self):
+        cache = QuoteCache(ttl=5, stale_ttl=30, max_size=2)
+        loaded: list[str] = []
+
+        async def load(symbol: str):
+            loaded.append(symbol)
+            return quote(symbol)
+
+        cache.set("a.us", quote("A.US"))
+        cache.set("b.us", quote("B.US"))
+        await cache.get("a.us", loader=load)
+        cache.set("c.us", quote("C.US"))
+        await cache.get("a.us", loader=load)
+        await cache.get("b.us", loader=load)
+
+        assert loaded == ["B.US"]
+        assert (cache.stats().size, cache.evictions) == (2, 2)
+
+
+class TestStocksDetails:
+    async def test_should_fetch_in_chunks(
+        self, client: AsyncClient, stooq: Stooq, monkeypatch: MonkeyPatch
+    ):
+        monkeypatch.setattr(settings, "BATCH_CHUNK_SIZE", 2)
+        symbols = [f"S{idx}.US" for idx in range(5)]
+        stooq.quotes = {symbol: quote(symbol) for symbol in symbols}
+
+        response = await client.get("/details", params={"s": ",".join(symbols)})
+
+        assert response.status_code == 200
+        assert sorted(stooq.symbols) == [symbols[0:2], symbols[2:4], symbols[4:]]
+        assert sorted(response.json()["results"]) == symbols
+
+    @mark.parametrize(argnames="s", argvalues=["", ",", " , "])
+    async def test_should_reject_an_empty_batch(
+        self, client: AsyncClient, stooq: Stooq, s: str
+    ):
+        response = await client.get("/details", params={"s": s})
+
+        assert response.status_code == 400
+        assert stooq.requests == []
+
+    async def test_should_reject_an_oversized_batch(
+        self, client: AsyncClient, stooq: Stooq, monkeypatch: MonkeyPatch
+    ):
+        monkeypatch.setattr(settings, "BATCH_MAX_SYMBOLS", 3)
+
+        response = await client.get("/details", params={"s": "a.us,b.us,c.us,d.us"})
+
+        assert response.status_code == 400
+        assert stooq.requests == []
+
+    async def test_should_deduplicate_and_normalize_the_symbols(
+        self, client: AsyncClient, stooq: Stooq
+    ):
+        stooq.quotes = {"AAPL.US": quote("AAPL.US"), "MSFT.US": quote("MSFT.US")}
+
+        response = await client.get(
+            "/details", params={"s": "aapl.us, AAPL.US ,msft.us"}
+        )
+
+        assert response.status_code == 200
+        assert stooq.symbols == [["AAPL.US", "MSFT.US"]]
+        assert sorted(response.json()["results"]) == ["AAPL.US", "MSFT.US"]
+
+    async def test_should_report_unknown_symbols_and_upstream_failures(
+        self, client: AsyncClient, stooq: Stooq
+    ):
+        stooq.quotes = {"AAPL.US": quote("AAPL.US")}
+
+        unknown = await client.get("/details", params={"s": "aapl.us,bad.us"})
+        stooq.status_code = 503
+        failed = await client.get("/details", params={"s": "aapl.us,msft.us"})
+
+        assert unknown.status_code == failed.status_code == 200
+        assert list(unknown.json()["results"]) == ["AAPL.US"]
+        assert unknown.json()["errors"] == {
+            "BAD.US": "No data was found for this symbol"
+        }
+        assert list(failed.json()["results"]) == ["AAPL.US"]
+        assert failed.json()["errors"] == {
+            "MSFT.US": "Could not complete the request to the third-party service"
+        }
+
+    async def test_should_not_serve_an_unknown_symbol_from_the_cache(
+        self, client: AsyncClient, stooq: Stooq, cache: QuoteCache
+    ):
+        stooq.quotes = {"MSFT.US": quote("MSFT.US")}
+
+        single = await client.get("/details/bad.us")
+        batch = await client.get("/details", params={"s": "bad.us,msft.us"})
+
+        assert single.status_code == 500
+        assert batch.status_code == 200
+        assert list(batch.json()["results"]) == ["MSFT.US"]
+        assert batch.json()["errors"] == {"BAD.US": "No data was found for this symbol"}
+        assert cache.stats().size == 1